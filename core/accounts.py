@@ -0,0 +1,65 @@
+"""
+Session and signed-in user caching.
+
+Sessions use the cached_db engine, so a logged-in request reads its session from
+the cache and only writes through to django_session when the session changes.
+CachedModelBackend serves request.user, with its profile joined, from the cache
+for USER_CACHE_TIMEOUT seconds; core.signals drops the entry when the user or
+profile is saved or deleted and on logout. ModelBackend stays listed after it so
+sessions signed in through ModelBackend remain valid. Within a request, request.user is
+resolved once by AuthenticationMiddleware, so request.user.profile costs nothing.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.sessions.models import Session
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.utils import timezone
+
+
+def user_cache_key(user_id):
+    return f'core:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user reads the user and profile from the cache"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # Stop here: ModelBackend, listed after us for older sessions, would hash the password again
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = get_user_model()._default_manager.select_related('profile').filter(pk=user_id).first()
+            if user is None:
+                return None
+            # Users without a profile are cached too; the missing profile is remembered
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+def purge_expired_sessions(batch_size=1000):
+    """
+    Delete expired sessions a batch at a time, so each DELETE locks only a few rows
+    while logged-in requests keep writing sessions. Returns the number deleted.
+    """
+    expired = Session.objects.filter(expire_date__lt=timezone.now())
+    deleted = 0
+    while True:
+        batch = list(expired.values_list('session_key', flat=True)[:batch_size])
+        if not batch:
+            break
+        deleted += Session.objects.filter(session_key__in=batch).delete()[0]
+        if len(batch) < batch_size:
+            break
+    return deleted
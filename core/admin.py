@@ -1,12 +1,86 @@
+import datetime
+
+from django.conf import settings
 from django.contrib import admin
-from .models import UserProfile, TravelOption, TravelOptionDetail, TravelOptionImage, Booking, Passenger
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from .exports import export_response
+from .images import save_images
+from .rollups import route_stats_summary
+from .models import UserProfile, TravelOption, TravelOptionDetail, TravelOptionImage, DestinationSummary, Booking, Passenger, PaymentEvent, EndpointTiming, DailyRouteStats
+
+
+def estimated_row_count(model, using='default'):
+    """The database's row estimate for the model's table, or None if the backend has none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the database's row estimate instead of COUNT(*) for
+    unfiltered changelists of tables above ADMIN_ESTIMATED_COUNT_THRESHOLD rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class CachedValuesListFilter(admin.AllValuesFieldListFilter):
+    """Distinct-values filter whose choices are read from the cache instead of a full table scan"""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.lookup_choices = cache.get_or_set(
+            f'admin_filter_choices:{model._meta.label_lower}:{field_path}',
+            lambda: list(self.lookup_choices),
+            settings.ADMIN_FILTER_CHOICES_TIMEOUT,
+        )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists of tables too large to count exactly on every page"""
+    paginator = EstimatedCountPaginator
+    # Skips the second COUNT(*) behind "N results (M total)"
+    show_full_result_count = False
 
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'phone_number', 'city', 'country', 'created_at']
-    list_filter = ['country', 'city', 'created_at']
+    list_filter = [('country', CachedValuesListFilter), ('city', CachedValuesListFilter), 'created_at']
+    list_select_related = ['user']
     search_fields = ['user__username', 'user__email', 'phone_number', 'city']
+    autocomplete_fields = ['user']
     readonly_fields = ['created_at', 'updated_at']
 
 
@@ -34,27 +108,45 @@ class TravelOptionDetailInline(admin.StackedInline):
 
 
 @admin.register(TravelOption)
-class TravelOptionAdmin(admin.ModelAdmin):
+class TravelOptionAdmin(LargeTableAdmin):
     list_display = ['travel_id', 'travel_type', 'source', 'destination', 'departure_date', 'price_per_seat', 'available_seats', 'is_active']
-    list_filter = ['travel_type', 'is_active', 'departure_date', 'source', 'destination']
+    list_filter = [
+        'travel_type', 'is_active', 'departure_date',
+        ('source', CachedValuesListFilter), ('destination', CachedValuesListFilter),
+    ]
     search_fields = ['travel_id', 'source', 'destination', 'operator_name']
-    readonly_fields = ['travel_id', 'created_at', 'updated_at']
+    readonly_fields = ['travel_id', 'primary_image_url', 'created_at', 'updated_at']
     list_editable = ['is_active']
-    date_hierarchy = 'departure_date'
     inlines = [TravelOptionDetailInline, TravelOptionImageInline]
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not TravelOptionImage:
+            return super().save_formset(request, form, formset, change)
+        # Images are written in bulk with a single primary image update
+        formset.save(commit=False)
+        save_images(
+            form.instance,
+            new=formset.new_objects,
+            changed=[image for image, _ in formset.changed_objects],
+            deleted=formset.deleted_objects,
+        )
+
 
 @admin.register(TravelOptionDetail)
 class TravelOptionDetailAdmin(admin.ModelAdmin):
     list_display = ['travel_option', 'created_at']
+    list_select_related = ['travel_option']
+    autocomplete_fields = ['travel_option']
     search_fields = ['travel_option__travel_id', 'travel_option__source', 'travel_option__destination']
     readonly_fields = ['created_at', 'updated_at']
 
 
 @admin.register(TravelOptionImage)
-class TravelOptionImageAdmin(admin.ModelAdmin):
-    list_display = ['travel_option', 'image_title', 'is_primary', 'display_order', 'created_at']
+class TravelOptionImageAdmin(LargeTableAdmin):
+    list_display = ['preview', 'travel_option', 'image_title', 'is_primary', 'display_order', 'created_at']
     list_filter = ['is_primary', 'created_at', 'travel_option__travel_type']
+    list_select_related = ['travel_option']
+    autocomplete_fields = ['travel_option']
     search_fields = ['travel_option__travel_id', 'image_title', 'travel_option__destination']
     readonly_fields = ['created_at']
     list_editable = ['display_order']
@@ -69,20 +161,152 @@ class TravelOptionImageAdmin(admin.ModelAdmin):
             )
         return form
 
+    @admin.display(description='Image')
+    def preview(self, obj):
+        # The thumbnail variant, so a page of images does not download full-size originals
+        return format_html('<img src="{}" width="80" loading="lazy" alt="">', obj.thumbnail_url)
+
+
+@admin.register(DestinationSummary)
+class DestinationSummaryAdmin(admin.ModelAdmin):
+    list_display = ['destination', 'source', 'min_price', 'next_departure', 'active_option_count', 'updated_at']
+    search_fields = ['destination', 'source']
+    readonly_fields = [field.name for field in DestinationSummary._meta.fields]
+
+    def has_add_permission(self, request):
+        # Rows are maintained from TravelOption changes and rebuild_destination_summaries
+        return False
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(LargeTableAdmin):
+    list_display = ['event_id', 'event', 'order_id', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event']
+    search_fields = ['event_id', 'payment_id', 'order_id']
+    readonly_fields = [field.name for field in PaymentEvent._meta.fields]
+
+    def has_add_permission(self, request):
+        # Events are recorded by the payment webhook
+        return False
+
+
+@admin.register(EndpointTiming)
+class EndpointTimingAdmin(admin.ModelAdmin):
+    list_display = ['url_name', 'period_start', 'requests', 'errors', 'over_budget', 'avg_queries',
+                    'avg_db_ms', 'avg_view_ms', 'p50_view_ms', 'p95_view_ms', 'max_view_ms']
+    list_filter = ['url_name']
+    search_fields = ['url_name']
+    date_hierarchy = 'period_start'
+    readonly_fields = [
+        field.name for field in EndpointTiming._meta.fields if field.name != 'histogram'
+    ] + ['histogram_display']
+
+    def has_add_permission(self, request):
+        # Rows are written by RequestMetricsMiddleware
+        return False
+
+    def _average(self, obj, field):
+        return round(getattr(obj, field) / obj.requests, 1) if obj.requests else None
+
+    @admin.display(description="Avg queries")
+    def avg_queries(self, obj):
+        return self._average(obj, 'queries')
+
+    @admin.display(description="Avg DB ms")
+    def avg_db_ms(self, obj):
+        return self._average(obj, 'db_ms')
+
+    @admin.display(description="Avg view ms")
+    def avg_view_ms(self, obj):
+        return self._average(obj, 'view_ms')
+
+    @admin.display(description="p50 ms ≤")
+    def p50_view_ms(self, obj):
+        return obj.view_ms_percentile(50) or f"> {EndpointTiming.HISTOGRAM_BOUNDS_MS[-1]}"
+
+    @admin.display(description="p95 ms ≤")
+    def p95_view_ms(self, obj):
+        return obj.view_ms_percentile(95) or f"> {EndpointTiming.HISTOGRAM_BOUNDS_MS[-1]}"
+
+    @admin.display(description="View time histogram")
+    def histogram_display(self, obj):
+        bounds = [f"≤ {bound} ms" for bound in EndpointTiming.HISTOGRAM_BOUNDS_MS]
+        bounds.append(f"> {EndpointTiming.HISTOGRAM_BOUNDS_MS[-1]} ms")
+        return format_html_join(
+            mark_safe('<br>'), '{}: {}', zip(bounds, obj.histogram)
+        )
+
+
+def _date_param(request, name, default):
+    try:
+        return parse_date(request.GET.get(name, '')) or default
+    except ValueError:
+        return default
+
+
+@admin.register(DailyRouteStats)
+class DailyRouteStatsAdmin(admin.ModelAdmin):
+    list_display = ['departure_date', 'source', 'destination', 'travel_type', 'departures', 'capacity',
+                    'seats_sold', 'bookings', 'confirmed_bookings', 'revenue', 'updated_at']
+    list_filter = ['travel_type', 'departure_date']
+    search_fields = ['source', 'destination']
+    readonly_fields = [field.name for field in DailyRouteStats._meta.fields]
+    # Days of departures around today shown by the dashboard by default
+    DASHBOARD_DAYS = 30
+
+    def has_add_permission(self, request):
+        # Rows are maintained by refresh_route_stats
+        return False
+
+    def get_urls(self):
+        return [
+            path('dashboard/', self.admin_site.admin_view(self.dashboard_view), name='core_dailyroutestats_dashboard'),
+        ] + super().get_urls()
+
+    def dashboard_view(self, request):
+        """Revenue, occupancy and conversion read from the rollup table only"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        today = timezone.localdate()
+        date_from = _date_param(request, 'from', today - datetime.timedelta(days=self.DASHBOARD_DAYS))
+        date_to = _date_param(request, 'to', today + datetime.timedelta(days=self.DASHBOARD_DAYS))
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Route dashboard",
+            'opts': self.opts,
+            'date_from': date_from,
+            'date_to': date_to,
+            **route_stats_summary(date_from, date_to),
+        }
+        return TemplateResponse(request, 'admin/core/dailyroutestats/dashboard.html', context)
+
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(LargeTableAdmin):
     list_display = ['booking_id', 'user', 'travel_option', 'number_of_seats', 'total_price', 'status', 'payment_status', 'booking_date']
     list_filter = ['status', 'payment_status', 'booking_date', 'travel_option__travel_type']
+    list_select_related = ['user', 'travel_option']
     search_fields = ['booking_id', 'user__username', 'user__email', 'transaction_id']
     readonly_fields = ['booking_id', 'created_at', 'updated_at']
     list_editable = ['status', 'payment_status']
-    date_hierarchy = 'booking_date'
+    autocomplete_fields = ['user', 'travel_option']
+    actions = ['export_csv', 'export_jsonl']
+
+    @admin.action(description="Export selected bookings as CSV")
+    def export_csv(self, request, queryset):
+        return export_response(queryset, 'csv', request)
+
+    @admin.action(description="Export selected bookings as JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset, 'jsonl', request)
 
 
 @admin.register(Passenger)
-class PassengerAdmin(admin.ModelAdmin):
+class PassengerAdmin(LargeTableAdmin):
     list_display = ['first_name', 'last_name', 'age', 'gender', 'booking', 'seat_number']
     list_filter = ['gender', 'booking__travel_option__travel_type']
+    # Booking.__str__ shows the username
+    list_select_related = ['booking__user']
     search_fields = ['first_name', 'last_name', 'booking__booking_id']
     readonly_fields = ['created_at']
+    autocomplete_fields = ['booking']
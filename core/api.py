@@ -0,0 +1,156 @@
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.text import slugify
+from django.views.decorators.http import require_GET
+
+from .catalog import upcoming_travel_options
+from .models import TravelOption
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+SEARCH_FIELDS = (
+    'pk', 'travel_id', 'travel_type', 'source', 'destination',
+    'departure_date', 'departure_time', 'arrival_date', 'arrival_time',
+    'price_per_seat', 'available_seats', 'operator_name',
+)
+
+
+class InvalidSearch(ValueError):
+    """Raised for malformed search parameters, reported as a 400 response"""
+
+
+def encode_cursor(*values):
+    """Opaque keyset cursor from the sort key of the last row on a page"""
+    payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *parsers):
+    """Decode a cursor made by encode_cursor, converting each value with its parser"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(parsers):
+            raise ValueError(cursor)
+        return tuple(parser(value) for parser, value in zip(parsers, values))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidSearch("Invalid cursor")
+
+
+def _finite_decimal(value):
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError(value)
+    return number
+
+
+def _parse(params, name, parser):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return parser(value)
+    except (ValueError, InvalidOperation):
+        raise InvalidSearch(f"Invalid value for {name}")
+
+
+def search_queryset(params):
+    """
+    Upcoming travel options matching the search parameters, in keyset order.
+
+    Pages are cut with a (departure_date, departure_time, id) keyset instead of an
+    OFFSET, so deep pages cost the same as the first one.
+    """
+    options = upcoming_travel_options()
+
+    if params.get('source'):
+        options = options.filter(source__iexact=params['source'])
+    if params.get('destination'):
+        options = options.filter(destination_slug=slugify(params['destination'], allow_unicode=True))
+
+    travel_type = params.get('travel_type')
+    if travel_type:
+        if travel_type not in dict(TravelOption.TRAVEL_TYPES):
+            raise InvalidSearch("Invalid value for travel_type")
+        options = options.filter(travel_type=travel_type)
+
+    date_from = _parse(params, 'date_from', datetime.date.fromisoformat)
+    date_to = _parse(params, 'date_to', datetime.date.fromisoformat)
+    if date_from:
+        options = options.filter(departure_date__gte=date_from)
+    if date_to:
+        options = options.filter(departure_date__lte=date_to)
+
+    min_price = _parse(params, 'min_price', _finite_decimal)
+    max_price = _parse(params, 'max_price', _finite_decimal)
+    if min_price is not None:
+        options = options.filter(price_per_seat__gte=min_price)
+    if max_price is not None:
+        options = options.filter(price_per_seat__lte=max_price)
+
+    if params.get('cursor'):
+        departure_date, departure_time, pk = decode_cursor(
+            params['cursor'], datetime.date.fromisoformat, datetime.time.fromisoformat, int
+        )
+        # The redundant range bound lets the planner seek into the departure index
+        options = options.filter(departure_date__gte=departure_date).filter(
+            Q(departure_date__gt=departure_date)
+            | Q(departure_date=departure_date, departure_time__gt=departure_time)
+            | Q(departure_date=departure_date, departure_time=departure_time, pk__gt=pk)
+        )
+
+    return options.order_by('departure_date', 'departure_time', 'pk').values(*SEARCH_FIELDS)
+
+
+def search_travel_options(params):
+    """Return one page of search results and the next page's cursor, or None on the last page"""
+    limit = _parse(params, 'limit', int)
+    if limit is None:
+        limit = SEARCH_PAGE_SIZE
+    if not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+        raise InvalidSearch(f"limit must be between 1 and {SEARCH_MAX_PAGE_SIZE}")
+
+    # One extra row tells whether another page follows
+    rows = list(search_queryset(params)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['departure_date'], last['departure_time'], last['pk'])
+    return rows, next_cursor
+
+
+def serialize_search_row(row):
+    return {
+        'travel_id': row['travel_id'],
+        'type': row['travel_type'],
+        'source': row['source'],
+        'destination': row['destination'],
+        'departure': f"{row['departure_date'].isoformat()}T{row['departure_time'].isoformat()}",
+        'arrival': f"{row['arrival_date'].isoformat()}T{row['arrival_time'].isoformat()}",
+        'price': str(row['price_per_seat']),
+        'seats': row['available_seats'],
+        'operator': row['operator_name'],
+    }
+
+
+@require_GET
+async def search_view(request):
+    """JSON search over upcoming travel options with keyset pagination"""
+    try:
+        rows, next_cursor = await sync_to_async(search_travel_options)(request.GET)
+    except InvalidSearch as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    return JsonResponse({
+        'results': [serialize_search_row(row) for row in rows],
+        'next_cursor': next_cursor,
+    })
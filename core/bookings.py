@@ -0,0 +1,56 @@
+"""
+Booking creation.
+
+create_booking is the single write path for new bookings: it prices the booking,
+holds its seats and writes the booking and all its passengers in one transaction,
+with the passengers in a single INSERT.
+"""
+from django.db import transaction
+
+from .inventory import hold_seats
+from .models import Booking, Passenger
+
+PASSENGER_FIELDS = ('first_name', 'last_name', 'age', 'gender')
+
+
+class InvalidBooking(ValueError):
+    """Raised when a booking request is inconsistent, e.g. seats and passengers differ"""
+
+
+def booking_total(travel_option, number_of_seats):
+    """Price of ``number_of_seats`` seats on a travel option"""
+    return travel_option.price_per_seat * number_of_seats
+
+
+def create_booking(user, travel_option, passengers, number_of_seats, **billing):
+    """
+    Create a pending booking that holds its seats until payment.
+
+    ``passengers`` are dicts of PASSENGER_FIELDS, one per seat; ``billing`` holds the
+    booking's billing_* fields. Raises InvalidBooking when the passenger count does not
+    match ``number_of_seats`` and InsufficientSeats when the seats are gone; either
+    way nothing is written.
+    """
+    passengers = list(passengers)
+    if len(passengers) != number_of_seats:
+        raise InvalidBooking(
+            f"{number_of_seats} seat(s) were requested for {len(passengers)} passenger(s)"
+        )
+
+    booking = Booking(
+        user=user,
+        travel_option=travel_option,
+        number_of_seats=number_of_seats,
+        total_price=booking_total(travel_option, number_of_seats),
+        status='pending',
+        payment_status='pending',
+        **billing,
+    )
+    with transaction.atomic():
+        hold_seats(booking)
+        booking.save()
+        Passenger.objects.bulk_create([
+            Passenger(booking=booking, **{field: passenger[field] for field in PASSENGER_FIELDS})
+            for passenger in passengers
+        ])
+    return booking
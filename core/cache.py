@@ -0,0 +1,151 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import DestinationSummary
+
+FEATURED_DESTINATIONS_CACHE_KEY = 'core:featured_destinations:v2'
+FEATURED_DESTINATIONS_LOCK_KEY = 'core:featured_destinations:lock'
+FEATURED_DESTINATIONS_LIMIT = 6
+
+CATALOG_VERSION_KEY = 'core:catalog_version'
+CATALOG_PAGE_KEY_PREFIX = 'core:catalog_page'
+
+# How long a request that lost the rebuild race waits for the winner
+REBUILD_LOCK_TIMEOUT = 10
+REBUILD_WAIT_INTERVAL = 0.05
+REBUILD_WAIT_ATTEMPTS = 20
+
+
+def _build_featured_destinations():
+    return [
+        {
+            'name': summary.destination,
+            'slug': summary.slug,
+            'source': summary.source,
+            'min_price': summary.min_price,
+            'travel_types': summary.travel_types,
+            'primary_image_url': summary.primary_image_url,
+        }
+        for summary in DestinationSummary.objects.all()[:FEATURED_DESTINATIONS_LIMIT]
+    ]
+
+
+def _rebuild_featured_destinations():
+    try:
+        payload = _build_featured_destinations()
+        timeout = settings.FEATURED_DESTINATIONS_CACHE_TIMEOUT
+        # Entries outlive their soft expiry so stale data can be served during a rebuild
+        cache.set(
+            FEATURED_DESTINATIONS_CACHE_KEY,
+            (payload, time.time() + timeout),
+            timeout * 2
+        )
+        return payload
+    finally:
+        cache.delete(FEATURED_DESTINATIONS_LOCK_KEY)
+
+
+def get_featured_destinations():
+    """
+    Featured destinations for the home page, served from the cache.
+
+    Only the request that wins the rebuild lock queries the database; others keep
+    serving the stale payload, or briefly wait for the winner when the cache is cold.
+    """
+    entry = cache.get(FEATURED_DESTINATIONS_CACHE_KEY)
+    if entry is not None:
+        payload, stale_at = entry
+        if time.time() < stale_at:
+            return payload
+        if cache.add(FEATURED_DESTINATIONS_LOCK_KEY, True, REBUILD_LOCK_TIMEOUT):
+            return _rebuild_featured_destinations()
+        return payload
+
+    if cache.add(FEATURED_DESTINATIONS_LOCK_KEY, True, REBUILD_LOCK_TIMEOUT):
+        return _rebuild_featured_destinations()
+
+    for _ in range(REBUILD_WAIT_ATTEMPTS):
+        time.sleep(REBUILD_WAIT_INTERVAL)
+        entry = cache.get(FEATURED_DESTINATIONS_CACHE_KEY)
+        if entry is not None:
+            return entry[0]
+
+    # The rebuilding request is taking too long, fall back to the database
+    return _build_featured_destinations()
+
+
+def invalidate_featured_destinations():
+    cache.delete(FEATURED_DESTINATIONS_CACHE_KEY)
+
+
+def bump_catalog_version():
+    """Mark every catalog page as changed; cached copies and client ETags go stale"""
+    cache.set(CATALOG_VERSION_KEY, time.time(), None)
+
+
+def catalog_version():
+    """
+    Time of the last catalog change. If the cache has lost it, the current time is
+    stored, so pages are re-rendered rather than wrongly reported unchanged.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time(), None)
+        version = cache.get(CATALOG_VERSION_KEY, time.time())
+    # Departures drop out of the catalog at midnight without any change being saved
+    midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(version, midnight.timestamp())
+
+
+def catalog_page(view):
+    """
+    Conditional GET and anonymous full-page caching for catalog views.
+
+    Responses carry an ETag and Last-Modified derived from catalog_version(), so
+    unchanged pages are answered with 304 before the view runs. Anonymous 200
+    responses are kept in the cache under the version, which retires them when the
+    catalog changes. Requests with pending messages always render.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return view(request, *args, **kwargs)
+
+        version = catalog_version()
+        viewer = f'user{request.user.pk}' if request.user.is_authenticated else 'anonymous'
+        etag = quote_etag(hashlib.md5(f'{version!r}:{viewer}'.encode()).hexdigest())
+        last_modified = int(version)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = _anonymous_page(request, version, view, args, kwargs)
+        if response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_vary_headers(response, ('Cookie',))
+            # Browsers revalidate every time and usually get a 304
+            patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+        return response
+    return wrapper
+
+
+def _anonymous_page(request, version, view, args, kwargs):
+    if request.user.is_authenticated:
+        return view(request, *args, **kwargs)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    key = f'{CATALOG_PAGE_KEY_PREFIX}:{version!r}:{path}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    response = view(request, *args, **kwargs)
+    # Responses that set cookies, such as consumed messages, belong to one visitor
+    if response.status_code == 200 and not response.cookies and not response.streaming:
+        cache.set(key, response, settings.CATALOG_PAGE_CACHE_TIMEOUT)
+    return response
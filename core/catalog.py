@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .cache import bump_catalog_version, invalidate_featured_destinations
+from .models import DestinationSummary, TravelOption
+
+
+def upcoming_travel_options():
+    """Active travel options that have not departed yet"""
+    return TravelOption.objects.filter(
+        is_active=True,
+        departure_date__gte=timezone.now().date()
+    )
+
+
+def destination_catalog_rows(destinations=None):
+    """
+    Aggregate upcoming travel options per destination in a single query.
+
+    Returns a values queryset with the destination name, minimum fare, earliest
+    departure and per-type option counts, ordered by the earliest departure. Pass
+    ``destinations`` to restrict the aggregation to a subset of destinations.
+    """
+    options = upcoming_travel_options()
+    if destinations is not None:
+        options = options.filter(destination__in=destinations)
+
+    type_counts = {
+        f'{travel_type}_count': Count('pk', filter=Q(travel_type=travel_type))
+        for travel_type, _ in TravelOption.TRAVEL_TYPES
+    }
+
+    return options.values('destination').annotate(
+        min_price=Min('price_per_seat'),
+        next_departure=Min('departure_date'),
+        option_count=Count('pk'),
+        **type_counts
+    ).order_by('next_departure', 'destination')
+
+
+def destination_sample_rows(destinations=None):
+    """
+    The earliest upcoming departure of every destination in a single query.
+
+    Returns a values queryset with the destination, the departure's source and its
+    primary image URL, which core.images keeps on the travel option.
+    """
+    options = upcoming_travel_options()
+    if destinations is not None:
+        options = options.filter(destination__in=destinations)
+
+    return options.annotate(
+        departure_rank=Window(
+            RowNumber(),
+            partition_by=[F('destination')],
+            order_by=[F('departure_date').asc(), F('departure_time').asc(), F('pk').asc()],
+        ),
+    ).filter(departure_rank=1).values('destination', 'source', 'primary_image_url')
+
+
+def destination_catalog(limit=None, destinations=None):
+    """
+    Per-destination catalog entries as dicts, built from two queries regardless of
+    how many travel options are on sale.
+    """
+    rows = destination_catalog_rows(destinations)
+    if limit is not None:
+        rows = rows[:limit]
+    rows = list(rows)
+
+    samples = {
+        sample['destination']: sample
+        for sample in destination_sample_rows([row['destination'] for row in rows])
+    } if rows else {}
+
+    catalog = []
+    for row in rows:
+        sample = samples.get(row['destination'], {})
+        catalog.append({
+            'name': row['destination'],
+            'slug': slugify(row['destination'], allow_unicode=True),
+            'min_price': row['min_price'],
+            'next_departure': row['next_departure'],
+            'option_count': row['option_count'],
+            'primary_image_url': sample.get('primary_image_url'),
+            'source': sample.get('source'),
+            'travel_types': [
+                travel_type for travel_type, _ in TravelOption.TRAVEL_TYPES
+                if row[f'{travel_type}_count']
+            ],
+        })
+    return catalog
+
+
+def _summary_from_entry(entry):
+    return DestinationSummary(
+        destination=entry['name'],
+        source=entry['source'] or '',
+        min_price=entry['min_price'],
+        travel_types=entry['travel_types'],
+        next_departure=entry['next_departure'],
+        primary_image_url=entry['primary_image_url'] or '',
+        active_option_count=entry['option_count'],
+    )
+
+
+def refresh_destination_summaries(destinations):
+    """Recompute the DestinationSummary rows for the given destinations"""
+    destinations = {destination for destination in destinations if destination}
+    if not destinations:
+        return
+
+    entries = destination_catalog(destinations=destinations)
+    with transaction.atomic():
+        # Destinations without upcoming options drop out of the catalog
+        DestinationSummary.objects.filter(destination__in=destinations).exclude(
+            destination__in=[entry['name'] for entry in entries]
+        ).delete()
+        for entry in entries:
+            summary = _summary_from_entry(entry)
+            DestinationSummary.objects.update_or_create(
+                destination=summary.destination,
+                defaults={
+                    'source': summary.source,
+                    'min_price': summary.min_price,
+                    'travel_types': summary.travel_types,
+                    'next_departure': summary.next_departure,
+                    'primary_image_url': summary.primary_image_url,
+                    'active_option_count': summary.active_option_count,
+                }
+            )
+    invalidate_featured_destinations()
+    bump_catalog_version()
+
+
+def rebuild_destination_summaries():
+    """Rebuild the whole DestinationSummary table from TravelOption"""
+    summaries = [_summary_from_entry(entry) for entry in destination_catalog()]
+    with transaction.atomic():
+        DestinationSummary.objects.all().delete()
+        DestinationSummary.objects.bulk_create(summaries)
+    invalidate_featured_destinations()
+    bump_catalog_version()
+    return len(summaries)
@@ -0,0 +1,162 @@
+"""
+Booking exports for finance.
+
+Bookings are read in keyset chunks of (booking_date, id), each chunk with its
+travel options and users joined and its passengers in one extra query, and are
+written out row by row. Memory therefore depends on the chunk size, not on the
+number of bookings; QuerySet.iterator() would not guarantee that, as the MySQL
+driver buffers whole result sets.
+
+Under ASGI the lines are handed to the server through an async iterator, in
+batches of ASYNC_EXPORT_BATCH_LINES.
+"""
+import csv
+import datetime
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Booking, Passenger
+
+EXPORT_CHUNK_SIZE = 2000
+# Lines sent per thread hop when streaming to an ASGI server
+ASYNC_EXPORT_BATCH_LINES = 500
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+BOOKING_COLUMNS = (
+    ('booking_id', lambda booking: booking.booking_id),
+    ('booking_date', lambda booking: booking.booking_date.isoformat()),
+    ('username', lambda booking: booking.user.username),
+    ('email', lambda booking: booking.user.email),
+    ('status', lambda booking: booking.status),
+    ('payment_status', lambda booking: booking.payment_status),
+    ('payment_method', lambda booking: booking.payment_method),
+    ('transaction_id', lambda booking: booking.transaction_id),
+    ('payment_date', lambda booking: booking.payment_date.isoformat() if booking.payment_date else ''),
+    ('number_of_seats', lambda booking: booking.number_of_seats),
+    ('total_price', lambda booking: str(booking.total_price)),
+    ('travel_id', lambda booking: booking.travel_option.travel_id),
+    ('travel_type', lambda booking: booking.travel_option.travel_type),
+    ('source', lambda booking: booking.travel_option.source),
+    ('destination', lambda booking: booking.travel_option.destination),
+    ('departure_date', lambda booking: booking.travel_option.departure_date.isoformat()),
+    ('departure_time', lambda booking: booking.travel_option.departure_time.isoformat()),
+    ('operator_name', lambda booking: booking.travel_option.operator_name),
+    ('billing_name', lambda booking: booking.billing_name),
+    ('billing_city', lambda booking: booking.billing_city),
+    ('billing_country', lambda booking: booking.billing_country),
+)
+PASSENGER_FIELDS = ('first_name', 'last_name', 'age', 'gender', 'seat_number')
+
+
+def _start_of_day(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def filter_bookings(bookings=None, date_from=None, date_to=None, status=None, payment_status=None):
+    """Bookings filtered in SQL; ``date_to`` is inclusive"""
+    bookings = Booking.objects.all() if bookings is None else bookings
+    # Plain datetime bounds, so the booking_date index serves the range
+    if date_from:
+        bookings = bookings.filter(booking_date__gte=_start_of_day(date_from))
+    if date_to:
+        bookings = bookings.filter(booking_date__lt=_start_of_day(date_to + datetime.timedelta(days=1)))
+    if status:
+        bookings = bookings.filter(status=status)
+    if payment_status:
+        bookings = bookings.filter(payment_status=payment_status)
+    return bookings
+
+
+def iter_bookings(bookings, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the bookings with travel option, user and passengers, one keyset chunk at a time"""
+    bookings = bookings.select_related('travel_option', 'user').prefetch_related(
+        Prefetch('passengers', queryset=Passenger.objects.only('booking_id', *PASSENGER_FIELDS).order_by('pk'))
+    ).order_by('booking_date', 'pk')
+    last = None
+    while True:
+        chunk = bookings
+        if last is not None:
+            chunk = chunk.filter(
+                Q(booking_date__gt=last.booking_date) | Q(booking_date=last.booking_date, pk__gt=last.pk)
+            )
+        chunk = list(chunk[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+
+
+def _passengers(booking):
+    return [{field: getattr(passenger, field) for field in PASSENGER_FIELDS} for passenger in booking.passengers.all()]
+
+
+def _csv_value(value):
+    # Spreadsheets would run user-entered text starting with these as a formula
+    if isinstance(value, str) and value.startswith(('=', '+', '-', '@', '\t', '\r')):
+        return f"'{value}"
+    return value
+
+
+class _Echo:
+    """File-like object whose write returns the value, so csv.writer can feed a generator"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(bookings):
+    """One CSV line per booking, passengers in a single 'First Last (age, gender)' column"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in BOOKING_COLUMNS] + ['passengers'])
+    for booking in bookings:
+        passengers = '; '.join(
+            f"{passenger['first_name']} {passenger['last_name']} ({passenger['age']}, {passenger['gender']})"
+            for passenger in _passengers(booking)
+        )
+        yield writer.writerow([_csv_value(value(booking)) for _, value in BOOKING_COLUMNS] + [_csv_value(passengers)])
+
+
+def jsonl_lines(bookings):
+    """One JSON object per booking, with its passengers as a list"""
+    for booking in bookings:
+        row = {name: value(booking) for name, value in BOOKING_COLUMNS}
+        row['passengers'] = _passengers(booking)
+        yield json.dumps(row) + '\n'
+
+
+def export_lines(bookings, file_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Lines of a ``file_format`` export of the bookings queryset"""
+    writer = {'csv': csv_lines, 'jsonl': jsonl_lines}[file_format]
+    return writer(iter_bookings(bookings, chunk_size))
+
+
+async def _async_lines(lines):
+    """
+    Feed a sync line iterator to an async response a batch at a time. Django's ASGI
+    handler would otherwise read a sync iterator to the end before sending anything.
+    """
+    lines = iter(lines)
+    next_batch = sync_to_async(lambda: ''.join(islice(lines, ASYNC_EXPORT_BATCH_LINES)))
+    while batch := await next_batch():
+        yield batch
+
+
+def export_response(bookings, file_format, request=None):
+    """A streamed download of the bookings queryset; async under ASGI so it stays streamed"""
+    lines = export_lines(bookings, file_format)
+    if isinstance(request, ASGIRequest):
+        lines = _async_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="bookings-{timezone.now():%Y%m%d-%H%M%S}.{file_format}"'
+    )
+    return response
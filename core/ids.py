@@ -0,0 +1,138 @@
+"""
+Public identifiers for bookings and travel options.
+
+IDs come from the generator class in ``settings.ID_GENERATOR``. The default,
+SnowflakeGenerator, issues time-ordered 63-bit integers, so new rows append to the
+end of the unique index instead of landing on random B-tree pages, and encodes
+them as 13 Crockford base32 characters after the model's prefix.
+
+A snowflake ID is unique as long as no two live processes share a node id. The
+node id is ``settings.ID_NODE_ID`` (one per host, 0-31) combined with the process
+slot in ``ID_PROCESS_SLOT`` (0-31). gunicorn's pre_fork hook gives each new worker
+the lowest slot no other live worker holds.
+
+IDs from the earlier random-digit scheme stay valid: they are all digits and shorter
+than snowflake IDs, so the two can never collide and old rows need no rewrite.
+"""
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# Crockford's alphabet sorts in ASCII order, so encoded IDs sort like the integers
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ENCODED_LENGTH = 13  # 65 bits, enough for any 63-bit ID
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+_generator = None
+
+
+def encode_base32(value, length=ENCODED_LENGTH):
+    """Fixed-width Crockford base32 encoding of a non-negative integer"""
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[remainder])
+    if value:
+        raise ValueError(f"Value does not fit in {length} base32 characters")
+    return ''.join(reversed(chars))
+
+
+def decode_base32(encoded):
+    value = 0
+    for char in encoded:
+        value = value * 32 + CROCKFORD_ALPHABET.index(char)
+    return value
+
+
+def process_node_id():
+    """This process's 10-bit node id: 5 bits of host id and 5 bits of process slot"""
+    host = int(settings.ID_NODE_ID) % 32
+    slot = int(os.environ.get('ID_PROCESS_SLOT', '0')) % 32
+    return host << 5 | slot
+
+
+class SnowflakeGenerator:
+    """
+    Time-ordered IDs: 41 bits of milliseconds since EPOCH_MS, 10 bits of node id
+    and a 12-bit per-millisecond sequence.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_ms = -1
+        self.sequence = 0
+        self.pid = None
+        self.node_id = None
+
+    def next_int(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Read the node id after the fork; preloaded gunicorn workers share the master's memory
+                self.pid = os.getpid()
+                self.node_id = process_node_id()
+                self.last_ms = -1
+            now = self._now()
+            if now < self.last_ms:
+                # The clock moved back; wait rather than risk reusing a millisecond
+                now = self._wait_until(self.last_ms)
+            if now == self.last_ms:
+                self.sequence = (self.sequence + 1) & MAX_SEQUENCE
+                if not self.sequence:
+                    now = self._wait_until(self.last_ms + 1)
+            else:
+                self.sequence = 0
+            self.last_ms = now
+            return (now - EPOCH_MS) << (NODE_BITS + SEQUENCE_BITS) | self.node_id << SEQUENCE_BITS | self.sequence
+
+    def generate(self, prefix):
+        return f"{prefix}{encode_base32(self.next_int())}"
+
+    @staticmethod
+    def _now():
+        return time.time_ns() // 1_000_000
+
+    def _wait_until(self, ms):
+        now = self._now()
+        while now < ms:
+            time.sleep(0.0001)
+            now = self._now()
+        return now
+
+
+class RandomDigitsGenerator:
+    """The earlier scheme: random decimal digits, kept for comparison in benchmark_ids"""
+    DIGITS = {'BK': 10}
+    DEFAULT_DIGITS = 8
+
+    def generate(self, prefix):
+        return f"{prefix}{str(uuid.uuid4().int)[:self.DIGITS.get(prefix, self.DEFAULT_DIGITS)]}"
+
+
+def get_generator():
+    """The process's ID generator, created on first use"""
+    global _generator
+    if _generator is None:
+        _generator = import_string(settings.ID_GENERATOR)()
+    return _generator
+
+
+@receiver(setting_changed)
+def _reset_generator(setting, **kwargs):
+    global _generator
+    if setting.startswith('ID_'):
+        _generator = None
+
+
+def new_id(prefix):
+    """A new public ID starting with ``prefix``"""
+    return get_generator().generate(prefix)
@@ -0,0 +1,108 @@
+"""
+Responsive image URLs.
+
+Travel option images are stored as one full-size URL. Pages ask for a named
+variant instead (thumbnail, card or hero), and the provider named by
+IMAGE_URL_PROVIDER turns the stored URL and a width into a resized URL.
+CloudinaryProvider adds a Cloudinary transformation, so the image is cropped,
+resized and served as WebP or AVIF where the browser accepts it. URLs that a
+provider cannot transform come back unchanged and get no srcset.
+"""
+import re
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# Widths offered in srcset, the default width and the height/width ratio of the
+# crop; a ratio of None keeps the original proportions
+IMAGE_VARIANTS = {
+    'thumbnail': {'widths': (160, 320), 'width': 160, 'ratio': 0.75, 'sizes': '160px'},
+    'card': {
+        'widths': (400, 600, 800, 1200),
+        'width': 600,
+        'ratio': 0.625,
+        'sizes': '(min-width: 992px) 33vw, (min-width: 768px) 50vw, 100vw',
+    },
+    'hero': {'widths': (640, 960, 1280, 1920, 2560), 'width': 1280, 'ratio': None, 'sizes': '100vw'},
+}
+
+_provider = None
+
+
+class ImageUrlProvider:
+    """Serves every image at its stored size"""
+
+    def transform(self, url, width, height=None):
+        return url
+
+
+class CloudinaryProvider(ImageUrlProvider):
+    """Resizes res.cloudinary.com upload URLs with a transformation of their own"""
+
+    upload_url = re.compile(r'^(https?://res\.cloudinary\.com/[^/]+/image/upload/)(.+)$')
+    # Cloudinary's transformation parameter keys, so folders such as in_goa are not taken for one
+    transformation_keys = {
+        'a', 'ac', 'af', 'ar', 'b', 'bo', 'br', 'c', 'co', 'cs', 'd', 'dl', 'dn', 'dpr', 'du', 'e', 'eo',
+        'f', 'fl', 'fn', 'fps', 'g', 'h', 'if', 'ki', 'l', 'o', 'p', 'pg', 'q', 'r', 'so', 'sp', 't', 'u',
+        'vc', 'vs', 'w', 'x', 'y', 'z',
+    }
+
+    def is_transformation(self, segment):
+        """Whether a path segment is a transformation such as w_500,c_scale or t_named"""
+        return all(
+            key in self.transformation_keys and value
+            for key, _, value in (parameter.partition('_') for parameter in segment.split(','))
+        )
+
+    def transform(self, url, width, height=None):
+        match = self.upload_url.match(url)
+        if match is None:
+            return url
+        segments = match.group(2).split('/')
+        # Ours goes after the stored transformations, so it decides the final size
+        position = 0
+        while position < len(segments) - 1 and self.is_transformation(segments[position]):
+            position += 1
+        crop = f'c_fill,g_auto,w_{width},h_{height}' if height else f'c_limit,w_{width}'
+        segments.insert(position, f'{crop},f_auto,q_auto')
+        return match.group(1) + '/'.join(segments)
+
+
+def get_provider():
+    """The worker's image URL provider, created on first use"""
+    global _provider
+    if _provider is None:
+        _provider = import_string(settings.IMAGE_URL_PROVIDER)()
+    return _provider
+
+
+@receiver(setting_changed)
+def _reset_provider(setting, **kwargs):
+    global _provider
+    if setting == 'IMAGE_URL_PROVIDER':
+        _provider = None
+
+
+def variant_height(variant, width):
+    ratio = IMAGE_VARIANTS[variant]['ratio']
+    return round(width * ratio) if ratio else None
+
+
+def variant_url(url, variant, width=None):
+    """``url`` resized for ``variant``, at its default width unless ``width`` is given"""
+    if not url:
+        return url
+    width = width or IMAGE_VARIANTS[variant]['width']
+    return get_provider().transform(url, width, variant_height(variant, width))
+
+
+def variant_srcset(url, variant):
+    """A srcset of ``url`` at the variant's widths, or '' when the provider cannot resize it"""
+    if not url:
+        return ''
+    candidates = [(variant_url(url, variant, width), width) for width in IMAGE_VARIANTS[variant]['widths']]
+    if all(candidate == url for candidate, _ in candidates):
+        return ''
+    return ', '.join(f'{candidate} {width}w' for candidate, width in candidates)
@@ -0,0 +1,150 @@
+"""
+Travel option image management.
+
+Each travel option has at most one primary image, and TravelOption.primary_image_url
+holds a copy of its URL so catalog cards never join the image table. The functions
+here change a travel option's images with a few set-based statements and update the
+copy in the same transaction; single image saves and deletes go through
+set_primary_image via core.signals.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .catalog import refresh_destination_summaries
+from .models import TravelOption, TravelOptionImage
+
+# "Primary or first" image order
+PRIMARY_FIRST = ('-is_primary', 'display_order', 'created_at', 'pk')
+
+_batch = ContextVar('image_batch', default=False)
+
+
+@contextmanager
+def image_batch():
+    """Within the block, image signals leave the primary image to the batch function"""
+    token = _batch.set(True)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+
+def in_image_batch():
+    return _batch.get()
+
+
+def _travel_option_pk(travel_option):
+    return getattr(travel_option, 'pk', travel_option)
+
+
+def _schedule_summary_refresh(travel_option_pk):
+    def refresh():
+        destination = TravelOption.objects.filter(pk=travel_option_pk).values_list('destination', flat=True).first()
+        refresh_destination_summaries([destination])
+    transaction.on_commit(refresh)
+
+
+def set_primary_image(travel_option, image_id=None):
+    """
+    Make ``image_id``, or else the current primary or first image, the travel option's
+    only primary image and copy its URL onto the travel option.
+    """
+    travel_option_pk = _travel_option_pk(travel_option)
+    images = TravelOptionImage.objects.filter(travel_option_id=travel_option_pk)
+    with transaction.atomic():
+        primary = images.filter(pk=image_id).values_list('pk', 'image_url').first() if image_id is not None else None
+        if primary is None:
+            primary = images.order_by(*PRIMARY_FIRST).values_list('pk', 'image_url').first()
+        primary_id, image_url = primary or (None, '')
+        if primary_id is not None:
+            images.update(is_primary=Case(When(pk=primary_id, then=Value(True)), default=Value(False)))
+        TravelOption.objects.filter(pk=travel_option_pk).exclude(primary_image_url=image_url).update(
+            primary_image_url=image_url
+        )
+    return primary_id
+
+
+def attach_images(travel_option, images, primary_index=None):
+    """
+    Add unsaved TravelOptionImages after the travel option's existing images.
+
+    ``display_order`` follows the list order. The image at ``primary_index`` becomes
+    primary; otherwise the current primary stays, or the first image becomes primary.
+    """
+    travel_option_pk = _travel_option_pk(travel_option)
+    existing = TravelOptionImage.objects.filter(travel_option_id=travel_option_pk)
+    with transaction.atomic():
+        last = existing.order_by('-display_order').values_list('display_order', flat=True).first()
+        start = 0 if last is None else last + 1
+        for offset, image in enumerate(images):
+            image.travel_option_id = travel_option_pk
+            image.display_order = start + offset
+            image.is_primary = offset == primary_index
+        if primary_index is not None:
+            existing.filter(is_primary=True).update(is_primary=False)
+        created = TravelOptionImage.objects.bulk_create(images)
+        set_primary_image(travel_option_pk)
+        _schedule_summary_refresh(travel_option_pk)
+    return created
+
+
+def reorder_images(travel_option, image_ids, primary_id=None):
+    """
+    Set ``display_order`` of the travel option's images to their position in
+    ``image_ids`` in one UPDATE, optionally making ``primary_id`` the primary image.
+    Images missing from ``image_ids`` keep their order after the listed ones.
+    """
+    travel_option_pk = _travel_option_pk(travel_option)
+    image_ids = list(image_ids)
+    images = TravelOptionImage.objects.filter(travel_option_id=travel_option_pk)
+    with transaction.atomic():
+        if image_ids:
+            images.update(display_order=Case(
+                *[When(pk=image_id, then=Value(position)) for position, image_id in enumerate(image_ids)],
+                default=Value(len(image_ids)),
+            ))
+        set_primary_image(travel_option_pk, primary_id)
+        _schedule_summary_refresh(travel_option_pk)
+
+
+def save_images(travel_option, new=(), changed=(), deleted=()):
+    """
+    Apply an image formset's changes in bulk: one DELETE, one INSERT and one UPDATE,
+    then a single primary image update.
+    """
+    travel_option_pk = _travel_option_pk(travel_option)
+    changed = [image for image in changed if image.pk]
+    # The last image marked primary wins, as it would if saved one by one. Admin formsets
+    # save changed images before new ones, so a newly ticked image beats an existing primary
+    marked = [image for image in (*changed, *new) if image.is_primary]
+    winner = marked[-1] if marked else None
+    for image in (*new, *changed):
+        image.is_primary = image is winner
+    with transaction.atomic():
+        if deleted:
+            with image_batch():
+                TravelOptionImage.objects.filter(pk__in=[image.pk for image in deleted]).delete()
+        if winner is not None:
+            TravelOptionImage.objects.filter(travel_option_id=travel_option_pk, is_primary=True).update(is_primary=False)
+        for image in new:
+            image.travel_option_id = travel_option_pk
+        TravelOptionImage.objects.bulk_create(new)
+        if changed:
+            TravelOptionImage.objects.bulk_update(
+                changed, ['image_url', 'image_title', 'is_primary', 'display_order']
+            )
+        set_primary_image(travel_option_pk)
+        _schedule_summary_refresh(travel_option_pk)
+
+
+def sync_primary_image_urls(travel_options=None):
+    """Recompute primary_image_url for many travel options in one UPDATE"""
+    primary_image = TravelOptionImage.objects.filter(
+        travel_option=OuterRef('pk')
+    ).order_by(*PRIMARY_FIRST).values('image_url')[:1]
+    travel_options = TravelOption.objects.all() if travel_options is None else travel_options
+    return travel_options.update(primary_image_url=Coalesce(Subquery(primary_image), Value('')))
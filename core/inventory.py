@@ -0,0 +1,142 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import Booking, TravelOption
+
+
+class InsufficientSeats(Exception):
+    """Raised when a travel option cannot cover the requested number of seats"""
+
+
+def _travel_option_pk(travel_option):
+    return getattr(travel_option, 'pk', travel_option)
+
+
+def reserve_seats(travel_option, seats):
+    """
+    Atomically take ``seats`` from a travel option's availability.
+
+    The decrement is a single conditional UPDATE of ``available_seats`` so concurrent
+    reservations can neither lose updates nor oversell. Raises InsufficientSeats when
+    fewer seats are left.
+    """
+    updated = TravelOption.objects.filter(
+        pk=_travel_option_pk(travel_option),
+        available_seats__gte=seats
+    ).update(available_seats=F('available_seats') - seats)
+    if not updated:
+        raise InsufficientSeats(f"{seats} seat(s) are no longer available")
+    # Destination pages show the seats left
+    transaction.on_commit(bump_catalog_version)
+
+
+def release_seats(travel_option, seats):
+    """Atomically return ``seats`` to a travel option, capped at its total seats"""
+    TravelOption.objects.filter(pk=_travel_option_pk(travel_option)).update(
+        available_seats=Least(F('available_seats') + seats, F('total_seats'))
+    )
+    transaction.on_commit(bump_catalog_version)
+
+
+def hold_seats(booking):
+    """
+    Reserve the seats of an unsaved pending booking and stamp its hold expiry.
+
+    Call inside the transaction that saves the booking so a failed save also
+    returns the seats.
+    """
+    reserve_seats(booking.travel_option_id, booking.number_of_seats)
+    booking.hold_expires_at = timezone.now() + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+
+
+def confirm_booking(booking, **fields):
+    """
+    Confirm a booking and turn its seat hold into sold seats.
+
+    A booking that still holds its seats keeps them; one whose hold was already
+    released has to reserve them again and may raise InsufficientSeats. Returns False
+    if the booking was already confirmed, so repeated confirmations are no-ops.
+    """
+    now = timezone.now()
+    fields.update(status='confirmed', hold_expires_at=None, updated_at=now)
+    pending = Booking.objects.filter(pk=booking.pk).exclude(status='confirmed')
+
+    with transaction.atomic():
+        if pending.filter(hold_expires_at__isnull=False).update(**fields):
+            return True
+        if not pending.update(**fields):
+            return False
+        reserve_seats(booking.travel_option_id, booking.number_of_seats)
+        return True
+
+
+def release_expired_holds(batch_size=500):
+    """
+    Cancel pending bookings whose seat hold has expired and return their seats.
+
+    Bookings are processed in batches of ``batch_size``, each in its own short
+    transaction. Returns the number of bookings cancelled.
+    """
+    now = timezone.now()
+    expired = Booking.objects.filter(status='pending', hold_expires_at__lt=now)
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            # Rows locked by an in-flight payment confirmation are left for the next run
+            batch = list(
+                expired.select_for_update(skip_locked=True)
+                .order_by('hold_expires_at')
+                .values_list('pk', 'travel_option_id', 'number_of_seats')[:batch_size]
+            )
+            if not batch:
+                break
+
+            Booking.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(
+                status='cancelled',
+                hold_expires_at=None,
+                updated_at=now,
+            )
+            seats_by_option = Counter()
+            for _, travel_option_id, seats in batch:
+                seats_by_option[travel_option_id] += seats
+            for travel_option_id, seats in seats_by_option.items():
+                release_seats(travel_option_id, seats)
+
+        released += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    return released
+
+
+def cancel_stale_pending_bookings(batch_size=500):
+    """
+    Cancel pending bookings that never held seats and are older than a seat hold.
+
+    These are left over from before seat holds were introduced; no seats are returned.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+    stale = Booking.objects.filter(status='pending', hold_expires_at__isnull=True, booking_date__lt=cutoff)
+    cancelled = 0
+
+    while True:
+        batch = list(stale.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        cancelled += Booking.objects.filter(pk__in=batch, status='pending').update(
+            status='cancelled',
+            updated_at=now,
+        )
+        if len(batch) < batch_size:
+            break
+
+    return cancelled
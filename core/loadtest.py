@@ -0,0 +1,317 @@
+"""
+Load-testing helpers: a throwaway local gunicorn server, logged-in sessions and a
+virtual user that walks the booking funnel over HTTP.
+
+Virtual users pay through the stub gateway's signature scheme, so the target
+server must run with PAYMENT_GATEWAY=core.payments.StubGateway and the same
+Razorpay secret as this process.
+"""
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.urls import reverse
+
+from .inventory import release_seats
+from .models import Booking
+from .payments import StubGateway
+
+LOADTEST_USER_PREFIX = 'loadtest_'
+
+# Virtual user scenarios and the default share of users running each
+SCENARIOS = ('browse', 'abandon', 'book')
+DEFAULT_MIX = {'browse': 60, 'abandon': 25, 'book': 15}
+
+CSRF_TOKEN_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+# payment.html hands the order to payment.js in a data attribute
+ORDER_ID_RE = re.compile(r'data-order-id="([^"]+)"')
+PAYMENT_PATH_RE = re.compile(r'/payment/([^/]+)/$')
+
+
+class FunnelError(Exception):
+    """A funnel step returned something a browser could not continue from"""
+
+
+def login_session(user):
+    """A logged-in session for ``user``, returned as its session key"""
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def load_test_users(count):
+    """``count`` load-test users, created on first use"""
+    existing = set(User.objects.filter(username__startswith=LOADTEST_USER_PREFIX).values_list('username', flat=True))
+    User.objects.bulk_create([
+        User(username=f"{LOADTEST_USER_PREFIX}{index}", password='!')
+        for index in range(count)
+        if f"{LOADTEST_USER_PREFIX}{index}" not in existing
+    ])
+    return list(User.objects.filter(
+        username__in=[f"{LOADTEST_USER_PREFIX}{index}" for index in range(count)]
+    ).order_by('pk'))
+
+
+def cleanup_load_test_bookings():
+    """Delete load-test bookings and give back the seats they still hold or sold"""
+    bookings = Booking.objects.filter(user__username__startswith=LOADTEST_USER_PREFIX)
+    seats = Counter()
+    for travel_option_id, number_of_seats in bookings.exclude(status='cancelled').values_list(
+        'travel_option_id', 'number_of_seats'
+    ):
+        seats[travel_option_id] += number_of_seats
+    for travel_option_id, number_of_seats in seats.items():
+        release_seats(travel_option_id, number_of_seats)
+    return bookings.delete()[1].get(Booking._meta.label, 0)
+
+
+def parse_mix(value):
+    """Parse 'browse=60,abandon=25,book=15' into scenario weights"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS or not weight.strip().isdigit():
+            raise ValueError(f"Invalid mix entry {part!r}; expected one of {', '.join(SCENARIOS)} with a weight")
+        mix[name] = int(weight)
+    if not sum(mix.values()):
+        raise ValueError("The mix needs at least one non-zero weight")
+    return mix
+
+
+class LocalServer:
+    """Context manager running the project under gunicorn on localhost"""
+
+    def __init__(self, mode='wsgi', port=8765, workers=3, env=None):
+        self.mode = mode
+        self.port = port
+        self.workers = workers
+        self.env = env or {}
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.process = None
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            'SERVER_MODE': self.mode,
+            'WEB_CONCURRENCY': str(self.workers),
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            # Plain HTTP on localhost must not be redirected to HTTPS; everything else stays as deployed
+            'SECURE_SSL_REDIRECT': 'False',
+            **self.env,
+        }
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                '--bind', f"127.0.0.1:{self.port}",
+                '--pid', os.path.join('/tmp', f"lykke_loadtest_{self.port}.pid"),
+                '--access-logfile', os.devnull,
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_until_ready()
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def wait_until_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("The server exited during startup; is its worker class installed?")
+            try:
+                requests.get(self.base_url + reverse('api_search'), timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        raise RuntimeError(f"The server did not start within {timeout}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+class Recorder:
+    """Thread-safe collector of (endpoint, seconds, ok) samples and failed scenarios"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = Counter()
+        self.failed_scenarios = Counter()
+
+    def add(self, endpoint, seconds, ok):
+        with self.lock:
+            self.samples[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def scenario_failed(self, scenario):
+        with self.lock:
+            self.failed_scenarios[scenario] += 1
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(recorder, elapsed):
+    """Per-endpoint rows with request count, errors, throughput and latency percentiles in ms"""
+    rows = []
+    for endpoint, samples in recorder.samples.items():
+        latencies = sorted(seconds * 1000 for seconds in samples)
+        rows.append({
+            'endpoint': endpoint,
+            'requests': len(latencies),
+            'errors': recorder.errors[endpoint],
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        })
+    return rows
+
+
+class VirtualUser:
+    """One logged-in visitor walking the funnel over a keep-alive session"""
+
+    def __init__(self, base_url, session_key, catalog, recorder, gateway, rng):
+        self.base_url = base_url
+        self.catalog = catalog
+        self.recorder = recorder
+        self.gateway = gateway
+        self.rng = rng
+        self.http = requests.Session()
+        self.http.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+
+    def request(self, endpoint, method, path, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, allow_redirects=False, timeout=60, **kwargs)
+        except requests.RequestException:
+            self.recorder.add(endpoint, time.perf_counter() - started, False)
+            raise FunnelError(f"{endpoint}: connection failed")
+        ok = response.status_code in expected
+        self.recorder.add(endpoint, time.perf_counter() - started, ok)
+        if not ok:
+            raise FunnelError(f"{endpoint}: HTTP {response.status_code}")
+        return response
+
+    def browse(self):
+        self.request('home', 'get', reverse('home'))
+        self.request('destinations', 'get', reverse('destinations'))
+        slug = self.rng.choice(self.catalog['destinations'])
+        self.request('destination_detail', 'get', reverse('destination_detail', args=[slug]))
+
+    def start_booking(self):
+        self.browse()
+        travel_id = self.rng.choice(self.catalog['travel_ids'])
+        path = reverse('book_travel', args=[travel_id])
+        page = self.request('book (GET)', 'get', path)
+        token = CSRF_TOKEN_RE.search(page.text)
+        if not token:
+            raise FunnelError("book (GET): no CSRF token")
+
+        response = self.request('book (POST)', 'post', path, expected=(302,), data={
+            'csrfmiddlewaretoken': token.group(1),
+            'number_of_seats': 1,
+            'billing_name': 'Load Test',
+            'billing_city': 'Delhi',
+            'billing_country': 'India',
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 0,
+            'form-MIN_NUM_FORMS': 1,
+            'form-MAX_NUM_FORMS': 10,
+            'form-0-first_name': 'Load',
+            'form-0-last_name': 'Test',
+            'form-0-age': 30,
+            'form-0-gender': 'other',
+        }, headers={'Referer': self.base_url + path}, cookies={
+            # The CSRF cookie is Secure as deployed, so it is not sent back over plain HTTP on its own
+            settings.CSRF_COOKIE_NAME: page.cookies.get(settings.CSRF_COOKIE_NAME, ''),
+        })
+        booking = PAYMENT_PATH_RE.search(response.headers.get('Location', ''))
+        if not booking:
+            # Sold out or invalid: the form is shown again instead of the payment page
+            raise FunnelError("book (POST): no redirect to payment")
+        booking_id = booking.group(1)
+
+        payment = self.request('payment', 'get', reverse('payment', args=[booking_id]))
+        order = ORDER_ID_RE.search(payment.text)
+        if not order:
+            raise FunnelError("payment: no order id")
+        return booking_id, order.group(1)
+
+    def abandon(self):
+        self.start_booking()
+
+    def book(self):
+        booking_id, order_id = self.start_booking()
+        payment_id = f"pay_load{uuid.uuid4().hex[:10]}"
+        self.request('payment_success', 'post', reverse('payment_success'), expected=(302,), data={
+            'razorpay_payment_id': payment_id,
+            'razorpay_order_id': order_id,
+            'razorpay_signature': self.gateway.sign(order_id, payment_id),
+            'booking_id': booking_id,
+        })
+        self.request('booking_confirmation', 'get', reverse('booking_confirmation', args=[booking_id]))
+
+
+def run_load_test(base_url, users, catalog, mix, duration, seed=0):
+    """
+    Run one virtual user per entry in ``users`` for ``duration`` seconds.
+
+    Each iteration picks a scenario by the ``mix`` weights. Returns the recorder
+    and the elapsed wall time.
+    """
+    recorder = Recorder()
+    gateway = StubGateway()
+    sessions = [login_session(user) for user in users]
+    scenarios, weights = zip(*mix.items())
+    deadline = time.monotonic() + duration
+
+    def run(index):
+        rng = random.Random(seed + index)
+        user = VirtualUser(base_url, sessions[index], catalog, recorder, gateway, rng)
+        while time.monotonic() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            try:
+                getattr(user, scenario)()
+            except FunnelError:
+                recorder.scenario_failed(scenario)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(users))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
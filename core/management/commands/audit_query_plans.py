@@ -0,0 +1,126 @@
+import datetime
+import json
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from core.api import SEARCH_PAGE_SIZE, encode_cursor, search_queryset
+from core.catalog import destination_catalog_rows, destination_sample_rows
+from core.models import Booking, DestinationSummary, TravelOption
+
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(\w+)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def find_full_scans(plan):
+    """Return the tables an EXPLAIN plan reads with a full table scan"""
+    if connection.vendor == 'mysql':
+        return sorted(set(re.findall(
+            r'"table_name":\s*"(\w+)"[^{}]*?"access_type":\s*"ALL"', plan
+        )))
+    if connection.vendor == 'postgresql':
+        return sorted(set(POSTGRES_FULL_SCAN.findall(plan)))
+    return sorted(set(SQLITE_FULL_SCAN.findall(plan)))
+
+
+def explain(queryset):
+    if connection.vendor == 'mysql':
+        return json.dumps(json.loads(queryset.explain(format='JSON')), indent=2)
+    return queryset.explain()
+
+
+def view_queries():
+    """The querysets behind the catalog, booking and payment views, keyed by a label"""
+    today = timezone.now().date()
+    destination_slug = (
+        TravelOption.objects.filter(is_active=True).values_list('destination_slug', flat=True).first() or ''
+    )
+    booking = Booking.objects.order_by('-pk').only('user_id', 'booking_id', 'transaction_id').first()
+    user_id = booking.user_id if booking else 0
+
+    return {
+        'home: featured destinations': DestinationSummary.objects.all()[:6],
+        'destinations: summary listing': DestinationSummary.objects.all(),
+        'catalog rebuild: aggregation': destination_catalog_rows(),
+        'catalog rebuild: earliest departures': destination_sample_rows(),
+        'destination_detail: upcoming departures': TravelOption.objects.filter(
+            destination_slug=destination_slug,
+            is_active=True,
+            departure_date__gte=today,
+        ).order_by('departure_date', 'departure_time'),
+        'api/search: destination page': search_queryset({'destination': destination_slug})[:SEARCH_PAGE_SIZE + 1],
+        'api/search: deep page': search_queryset({
+            'cursor': encode_cursor(today + datetime.timedelta(days=90), datetime.time(12, 0), 0),
+        })[:SEARCH_PAGE_SIZE + 1],
+        'my_bookings: user history': Booking.objects.filter(user_id=user_id).order_by('-booking_date'),
+        'payment: booking by booking_id': Booking.objects.filter(
+            booking_id=booking.booking_id if booking else ''
+        ),
+        'payment_success: booking by transaction_id': Booking.objects.filter(
+            transaction_id=booking.transaction_id if booking else ''
+        ),
+        'release_expired_holds: expired holds': Booking.objects.filter(
+            status='pending', hold_expires_at__lt=timezone.now()
+        ).order_by('hold_expires_at')[:500],
+    }
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the queries behind each view, flag full table scans and optionally time them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--benchmark', action='store_true',
+                            help="Also execute each query and report its latency")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Executions per query with --benchmark")
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help="Print the full EXPLAIN output")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Database: {connection.vendor}, "
+            f"{TravelOption.objects.count()} travel options, {Booking.objects.count()} bookings\n"
+        )
+        flagged = 0
+
+        for label, queryset in view_queries().items():
+            try:
+                plan = explain(queryset)
+            except DatabaseError as exc:
+                # Some backends cannot EXPLAIN queries wrapped around window functions
+                plan, full_scans = f"EXPLAIN failed: {exc}", None
+            else:
+                full_scans = find_full_scans(plan)
+
+            if full_scans is None:
+                status = self.style.NOTICE("no plan available")
+            elif full_scans:
+                flagged += 1
+                status = self.style.WARNING(f"FULL SCAN on {', '.join(full_scans)}")
+            else:
+                status = self.style.SUCCESS("indexed")
+            line = f"{label:<48} {status}"
+
+            if options['benchmark']:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    rows = len(list(queryset.all()))
+                    timings.append((time.perf_counter() - started) * 1000)
+                line += (
+                    f"  rows={rows} median={statistics.median(timings):.2f}ms"
+                    f" max={max(timings):.2f}ms"
+                )
+
+            self.stdout.write(line)
+            if options['verbose_plans']:
+                self.stdout.write(plan + "\n")
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"\n{flagged} query plan(s) use full table scans"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo full table scans found"))
@@ -0,0 +1,107 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.ids import RandomDigitsGenerator, SnowflakeGenerator
+
+GENERATORS = {
+    'random': RandomDigitsGenerator,
+    'snowflake': SnowflakeGenerator,
+}
+TABLE_PREFIX = 'benchmark_ids_'
+
+
+def create_table(table):
+    quoted = connection.ops.quote_name(table)
+    index = connection.ops.quote_name(f"{table}_code_uniq")
+    if connection.vendor == 'mysql':
+        pk = 'id BIGINT AUTO_INCREMENT PRIMARY KEY'
+    elif connection.vendor == 'postgresql':
+        pk = 'id BIGSERIAL PRIMARY KEY'
+    else:
+        pk = 'id INTEGER PRIMARY KEY AUTOINCREMENT'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {quoted}")
+        cursor.execute(f"CREATE TABLE {quoted} ({pk}, code VARCHAR(20) NOT NULL)")
+        cursor.execute(f"CREATE UNIQUE INDEX {index} ON {quoted} (code)")
+
+
+def drop_table(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(table)}")
+
+
+def index_size(table):
+    """Bytes used by the table's unique code index, or None if the backend cannot tell"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f"ANALYZE TABLE {connection.ops.quote_name(table)}")
+            cursor.fetchall()
+            cursor.execute(
+                "SELECT index_length FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_relation_size(%s)", [f"{table}_code_uniq"])
+        else:
+            try:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [f"{table}_code_uniq"])
+            except Exception:
+                return None
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class Command(BaseCommand):
+    help = ("Compare insert throughput, index size and collisions of the random-digit and "
+            "snowflake booking IDs in scratch tables")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--generators', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--rows and --batch-size must be positive")
+
+        self.stdout.write(f"{options['rows']:,} booking IDs per generator on {connection.vendor}")
+        for name in options['generators']:
+            table = f"{TABLE_PREFIX}{name}"
+            create_table(table)
+            try:
+                self.report(name, *self.insert(table, GENERATORS[name](), options['rows'], options['batch_size']),
+                            index_size(table))
+            finally:
+                drop_table(table)
+
+    def insert(self, table, generator, rows, batch_size):
+        """Insert ``rows`` new IDs in batches; duplicates are counted and skipped, like a retry would"""
+        sql = f"INSERT INTO {connection.ops.quote_name(table)} (code) VALUES (%s)"
+        seen = set()
+        collisions = 0
+        elapsed = 0.0
+        remaining = rows
+        while remaining:
+            batch = []
+            while len(batch) < min(batch_size, remaining):
+                code = generator.generate('BK')
+                if code in seen:
+                    collisions += 1
+                    continue
+                seen.add(code)
+                batch.append((code,))
+            started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            elapsed += time.perf_counter() - started
+            remaining -= len(batch)
+        return rows / elapsed, collisions
+
+    def report(self, name, rows_per_second, collisions, size):
+        size = f"{size / 1024 / 1024:.1f} MiB" if size is not None else "n/a"
+        self.stdout.write(
+            f"{name:<10} {rows_per_second:10,.0f} inserts/s  index={size}  collisions={collisions}"
+        )
@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.catalog import upcoming_travel_options
+from core.loadtest import LocalServer, login_session, percentile
+from core.models import Booking
+
+BENCHMARK_USERNAME = 'benchmark_user'
+BENCHMARK_PREFIX = 'BENCH'
+
+
+def create_unpaid_bookings(user, travel_option, count):
+    """Pending bookings without a gateway order, so every payment page creates one"""
+    run = uuid.uuid4().hex[:6].upper()
+    return Booking.objects.bulk_create([
+        Booking(
+            booking_id=f"{BENCHMARK_PREFIX}{run}{index:07d}",
+            user=user,
+            travel_option=travel_option,
+            number_of_seats=1,
+            total_price=travel_option.price_per_seat,
+        )
+        for index in range(count)
+    ])
+
+
+class Command(BaseCommand):
+    help = ("Compare payment page throughput of the sync WSGI and the ASGI server modes "
+            "with the stub gateway's simulated latency")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'], choices=['wsgi', 'asgi'])
+        parser.add_argument('--latency', type=int, default=300,
+                            help="Simulated gateway round trip in milliseconds")
+        parser.add_argument('--requests', type=int, default=300,
+                            help="Payment page requests per mode")
+        parser.add_argument('--concurrency', type=int, default=30,
+                            help="Concurrent client connections")
+        parser.add_argument('--workers', type=int, default=3,
+                            help="Gunicorn workers per mode")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        travel_option = upcoming_travel_options().first()
+        if travel_option is None:
+            raise CommandError("No upcoming travel options; run seed_synthetic_data first")
+
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        cookies = {settings.SESSION_COOKIE_NAME: login_session(user)}
+
+        self.stdout.write(
+            f"{options['requests']} payment page requests per mode, {options['concurrency']} concurrent, "
+            f"{options['workers']} workers, {options['latency']}ms gateway latency"
+        )
+        try:
+            for mode in options['modes']:
+                bookings = create_unpaid_bookings(user, travel_option, options['requests'])
+                paths = [reverse('payment', args=[booking.booking_id]) for booking in bookings]
+                server = LocalServer(mode, options['port'], options['workers'], env={
+                    'PAYMENT_GATEWAY': 'core.payments.StubGateway',
+                    'PAYMENT_GATEWAY_STUB_LATENCY': str(options['latency']),
+                })
+                try:
+                    with server:
+                        result = self.run_load(server.base_url, paths, cookies, options['concurrency'])
+                except RuntimeError as exc:
+                    raise CommandError(exc)
+                self.report(mode, result)
+        finally:
+            Booking.objects.filter(user=user, booking_id__startswith=BENCHMARK_PREFIX).delete()
+
+    def run_load(self, base_url, paths, cookies, concurrency):
+        local = threading.local()
+
+        def fetch(path):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+                local.session.cookies.update(cookies)
+            started = time.perf_counter()
+            response = local.session.get(base_url + path, allow_redirects=False, timeout=120)
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, paths))
+        return time.perf_counter() - started, results
+
+    def report(self, mode, result):
+        elapsed, results = result
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        errors = sum(1 for _, status in results if status != 200)
+        self.stdout.write(
+            f"{mode:<5} {len(results) / elapsed:8.1f} req/s  "
+            f"p50={percentile(latencies, 50):.0f}ms p95={percentile(latencies, 95):.0f}ms "
+            f"max={latencies[-1]:.0f}ms  errors={errors}"
+        )
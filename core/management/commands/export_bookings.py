@@ -0,0 +1,51 @@
+import datetime
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines, filter_bookings
+from core.models import Booking
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = "Stream bookings with their travel option and passengers as CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--from', dest='date_from', help="First booking date, YYYY-MM-DD")
+        parser.add_argument('--to', dest='date_to', help="Last booking date, YYYY-MM-DD, inclusive")
+        parser.add_argument('--status', choices=[status for status, _ in Booking.BOOKING_STATUS])
+        parser.add_argument('--payment-status', choices=[status for status, _ in Booking.PAYMENT_STATUS])
+        parser.add_argument('--output', help="File to write; standard output by default")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        bookings = filter_bookings(
+            date_from=parse_date(options['date_from']) if options['date_from'] else None,
+            date_to=parse_date(options['date_to']) if options['date_to'] else None,
+            status=options['status'],
+            payment_status=options['payment_status'],
+        )
+        lines = export_lines(bookings, options['format'], chunk_size=options['chunk_size'])
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            count = 0
+            for line in lines:
+                output.write(line)
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        if options['output']:
+            rows = count - 1 if options['format'] == 'csv' else count
+            self.stderr.write(self.style.SUCCESS(f"Exported {rows} bookings to {options['output']}"))
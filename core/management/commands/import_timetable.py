@@ -0,0 +1,101 @@
+import json
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import refresh_destination_summaries
+from core.timetable import REQUIRED_FIELDS, import_timetable, read_rows
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+class Command(BaseCommand):
+    help = ("Stream operator timetables (CSV or JSON Lines) into the catalog, upserting "
+            "departures by operator, route and departure time")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Timetable files, or - for standard input")
+        parser.add_argument('--format', choices=sorted(set(FORMATS.values())),
+                            help="File format; taken from the file extension by default")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rejects', help="Write rejected rows with their errors to this JSON Lines file")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the rows")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        verbosity = options['verbosity']
+        started = time.perf_counter()
+        total = None
+        with ExitStack() as stack:
+            rejects = stack.enter_context(open(options['rejects'], 'w')) if options['rejects'] else None
+
+            def on_reject(line_number, row, error):
+                if rejects:
+                    rejects.write(json.dumps({'path': path, 'line': line_number, 'error': error, 'row': row}) + '\n')
+                elif verbosity > 1:
+                    self.stderr.write(f"{path}:{line_number}: {error}")
+
+            def on_batch(stats):
+                if verbosity > 0:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{path}: {stats.valid + stats.rejected} rows, {stats.rejected} rejected, "
+                        f"{(stats.valid + stats.rejected) / elapsed:,.0f} rows/s", ending='\r'
+                    )
+
+            for path in options['paths']:
+                file_format = options['format'] or FORMATS.get(Path(path).suffix.lower())
+                if file_format is None:
+                    raise CommandError(f"Cannot tell the format of {path}; pass --format")
+                stream = sys.stdin if path == '-' else stack.enter_context(open(path, newline='', encoding='utf-8'))
+                rows = read_rows(stream, file_format)
+                if file_format == 'csv':
+                    rows = self.check_columns(path, rows)
+
+                stats = import_timetable(
+                    rows,
+                    batch_size=options['batch_size'],
+                    on_reject=on_reject,
+                    on_batch=on_batch,
+                    dry_run=options['dry_run'],
+                )
+                total = stats if total is None else self.merge(total, stats)
+                self.stdout.write('')
+
+        if not options['dry_run']:
+            refresh_destination_summaries(total.destinations)
+
+        elapsed = time.perf_counter() - started
+        read = total.valid + total.rejected
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {read} rows in {elapsed:.1f}s ({read / elapsed:,.0f} rows/s): "
+            f"{total.created} created, {total.updated} updated, {total.unchanged} unchanged, "
+            f"{total.rejected} rejected"
+        ))
+
+    def check_columns(self, path, rows):
+        """Fail fast on a CSV file without the required header columns"""
+        first = next(rows, None)
+        if first is None:
+            return
+        missing = [name for name in REQUIRED_FIELDS if name not in first[1]]
+        if missing:
+            raise CommandError(f"{path} is missing the columns {', '.join(missing)}")
+        yield first
+        yield from rows
+
+    @staticmethod
+    def merge(total, stats):
+        total.valid += stats.valid
+        total.created += stats.created
+        total.updated += stats.updated
+        total.unchanged += stats.unchanged
+        total.rejected += stats.rejected
+        total.destinations |= stats.destinations
+        return total
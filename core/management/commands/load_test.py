@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import upcoming_travel_options
+from core.loadtest import (
+    DEFAULT_MIX, LocalServer, cleanup_load_test_bookings, load_test_users, parse_mix, run_load_test, summarize,
+)
+from core.models import DestinationSummary
+
+
+class Command(BaseCommand):
+    help = ("Drive the booking funnel (home, destinations, destination detail, booking, payment, "
+            "payment success) with concurrent virtual users and report latency per endpoint")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url',
+                            help="Base URL of a running server using StubGateway and this database; "
+                                 "by default a local gunicorn server is started")
+        parser.add_argument('--server-mode', choices=['wsgi', 'asgi'], default='wsgi',
+                            help="Server mode of the local server")
+        parser.add_argument('--workers', type=int, default=3,
+                            help="Gunicorn workers of the local server")
+        parser.add_argument('--port', type=int, default=8765,
+                            help="Port of the local server")
+        parser.add_argument('--gateway-latency', type=int, default=0,
+                            help="Simulated gateway round trip of the local server in milliseconds")
+        parser.add_argument('--concurrency', type=int, default=10,
+                            help="Concurrent virtual users")
+        parser.add_argument('--duration', type=int, default=30,
+                            help="Seconds to run")
+        parser.add_argument('--mix', default=','.join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+                            help="Scenario weights: browse (catalog only), abandon (stops at the payment "
+                                 "page) and book (pays)")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--max-p95', type=float,
+                            help="Fail if any endpoint's p95 latency exceeds this many milliseconds")
+        parser.add_argument('--max-error-rate', type=float,
+                            help="Fail if more than this fraction of requests fail")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        catalog = {
+            'destinations': [summary.slug for summary in DestinationSummary.objects.all()[:50]],
+            'travel_ids': list(
+                upcoming_travel_options().filter(available_seats__gte=20)
+                .order_by('-available_seats').values_list('travel_id', flat=True)[:200]
+            ),
+        }
+        if not catalog['destinations'] or not catalog['travel_ids']:
+            raise CommandError("No bookable travel options; run seed_synthetic_data first")
+
+        users = load_test_users(options['concurrency'])
+        self.stdout.write(
+            f"{options['concurrency']} virtual users for {options['duration']}s, mix "
+            + ', '.join(f"{name}={weight}" for name, weight in mix.items())
+        )
+        try:
+            if options['url']:
+                recorder, elapsed = run_load_test(
+                    options['url'].rstrip('/'), users, catalog, mix, options['duration'], options['seed']
+                )
+            else:
+                server = LocalServer(options['server_mode'], options['port'], options['workers'], env={
+                    'PAYMENT_GATEWAY': 'core.payments.StubGateway',
+                    'PAYMENT_GATEWAY_STUB_LATENCY': str(options['gateway_latency']),
+                })
+                try:
+                    with server:
+                        recorder, elapsed = run_load_test(
+                            server.base_url, users, catalog, mix, options['duration'], options['seed']
+                        )
+                except RuntimeError as exc:
+                    raise CommandError(exc)
+        finally:
+            cleanup_load_test_bookings()
+
+        self.report(summarize(recorder, elapsed), recorder, elapsed, options)
+
+    def report(self, rows, recorder, elapsed, options):
+        self.stdout.write(
+            f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<22}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50']:>9.0f}{row['p95']:>9.0f}{row['p99']:>9.0f}"
+            )
+        total = sum(row['requests'] for row in rows)
+        errors = sum(row['errors'] for row in rows)
+        self.stdout.write(f"{'total':<22}{total:>9}{errors:>8}{total / elapsed:>9.1f}")
+        if recorder.failed_scenarios:
+            self.stdout.write("Scenarios stopped midway: " + ', '.join(
+                f"{name}={count}" for name, count in recorder.failed_scenarios.items()
+            ))
+
+        slow = [row['endpoint'] for row in rows if options['max_p95'] and row['p95'] > options['max_p95']]
+        if slow:
+            raise CommandError(f"p95 above {options['max_p95']}ms: {', '.join(slow)}")
+        if options['max_error_rate'] is not None and total and errors / total > options['max_error_rate']:
+            raise CommandError(f"Error rate {errors / total:.1%} above {options['max_error_rate']:.1%}")
@@ -0,0 +1,167 @@
+import gzip
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.text import slugify
+
+from core.bookings import InvalidBooking, create_booking
+from core.inventory import InsufficientSeats
+from core.models import Booking, DestinationSummary, TravelOption
+
+try:
+    import brotli
+except ImportError:  # WhiteNoise only writes .br files when Brotli is installed
+    brotli = None
+
+INLINE_BLOCK = re.compile(r'<(style|script)(?![^>]*\ssrc=)[^>]*>(.*?)</\1>', re.S)
+STATIC_REFERENCE = re.compile(r'<(?:link|script)\b[^>]*\s(?:href|src)="([^"]+)"')
+SAMPLE_PASSENGER = {'first_name': 'Page', 'last_name': 'Weight', 'age': 30, 'gender': 'other'}
+
+
+def compressed_sizes(content):
+    """(raw, gzip, brotli) sizes of ``content``; brotli is None without the Brotli package"""
+    return (
+        len(content),
+        len(gzip.compress(content, 9)),
+        len(brotli.compress(content)) if brotli else None,
+    )
+
+
+def static_file(url):
+    """Bytes of a local static file referenced by ``url``, or None for other URLs"""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    name = url[len(settings.STATIC_URL):].split('?')[0]
+    collected = Path(settings.STATIC_ROOT, name)
+    path = collected if collected.is_file() else finders.find(name)
+    return Path(path).read_bytes() if path else None
+
+
+class Command(BaseCommand):
+    help = ("Report the transfer size of each page: its HTML, which Django sends uncompressed, "
+            "the inline CSS/JS within it, and its local static assets compressed as WhiteNoise "
+            "serves them")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="Also measure the signed-in pages as this user")
+        parser.add_argument('--destination',
+                            help="Destination page to measure; the one with the fewest departures by default")
+        parser.add_argument('--save', metavar='FILE', help="Record the sizes as JSON, to compare a later run with")
+        parser.add_argument('--baseline', metavar='FILE',
+                            help="Show each page's first view change against sizes recorded with --save")
+
+    def handle(self, *args, **options):
+        client = Client()
+        user = None
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f"No user {options['username']!r}")
+
+        encoding = 'br' if brotli else 'gzip'
+        baseline = self.load_baseline(options['baseline'], encoding) if options['baseline'] else None
+        self.stdout.write(
+            f"{'page':<22}{'html':>9}{'html ' + encoding:>10}{'inline':>9}{'assets ' + encoding:>12}"
+            f"{'first view':>12}{'repeat view':>13}" + (f"{'vs baseline':>13}" if baseline is not None else '')
+        )
+        sizes = {}
+        # The payment page needs a pending booking and an order; both are rolled back, and
+        # the stub gateway keeps the order away from Razorpay
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False,
+                               PAYMENT_GATEWAY='core.payments.StubGateway'), transaction.atomic():
+            for label, url in self.pages(user, options['destination']):
+                if url is None:
+                    self.stdout.write(f"{label:<22} skipped: nothing to show")
+                    continue
+                if user is not None:
+                    client.force_login(user)
+                response = client.get(url)
+                if response.status_code != 200:
+                    self.stdout.write(f"{label:<22} skipped: HTTP {response.status_code}")
+                    continue
+                sizes[label] = self.report(label, response.content, baseline)
+            transaction.set_rollback(True)
+
+        if options['save']:
+            Path(options['save']).write_text(json.dumps({'encoding': encoding, 'pages': sizes}, indent=2) + '\n')
+            self.stdout.write(f"Saved to {options['save']}")
+
+    def load_baseline(self, path, encoding):
+        try:
+            recorded = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+        if recorded.get('encoding') != encoding:
+            raise CommandError(f"{path} was recorded with {recorded.get('encoding')}, this run uses {encoding}")
+        return recorded.get('pages', {})
+
+    def pages(self, user, destination=None):
+        destination = destination or DestinationSummary.objects.order_by('active_option_count').values_list(
+            'destination', flat=True
+        ).first()
+        yield 'home', reverse('home')
+        yield 'destinations', reverse('destinations')
+        yield 'destination_detail', destination and reverse(
+            'destination_detail', args=[slugify(destination, allow_unicode=True)]
+        )
+        yield 'login', reverse('login')
+        yield 'register', reverse('register')
+        if user is None:
+            return
+        travel_id = TravelOption.objects.filter(is_active=True, available_seats__gt=0).values_list(
+            'travel_id', flat=True
+        ).first()
+        confirmed = Booking.objects.filter(user=user, status='confirmed').values_list('booking_id', flat=True).first()
+        yield 'booking', travel_id and reverse('book_travel', args=[travel_id])
+        pending = travel_id and self.pending_booking(user, travel_id)
+        yield 'payment', pending and reverse('payment', args=[pending])
+        yield 'booking_confirmation', confirmed and reverse('booking_confirmation', args=[confirmed])
+        yield 'my_bookings', reverse('my_bookings')
+        yield 'profile', reverse('profile')
+        yield 'edit_profile', reverse('edit_profile')
+
+    def pending_booking(self, user, travel_id):
+        """booking_id of a one-seat pending booking for ``user``, or None when the seats are gone"""
+        travel_option = TravelOption.objects.get(travel_id=travel_id)
+        try:
+            booking = create_booking(user, travel_option, [SAMPLE_PASSENGER], 1, billing_name=user.username)
+        except (InvalidBooking, InsufficientSeats):
+            return None
+        return booking.booking_id
+
+    def report(self, label, html, baseline=None):
+        html_sizes = compressed_sizes(html)
+        text = html.decode()
+        inline = sum(len(match.group(2).encode()) for match in INLINE_BLOCK.finditer(text))
+        assets = 0
+        for url in sorted(set(STATIC_REFERENCE.findall(text))):
+            content = static_file(url)
+            if content is not None:
+                assets += compressed_sizes(content)[2 if brotli else 1]
+        # Fingerprinted assets are cached for a year, so repeat views only fetch the HTML
+        sizes = {
+            'html': html_sizes[0],
+            'html_compressed': html_sizes[2 if brotli else 1],
+            'inline': inline,
+            'assets': assets,
+            'first_view': html_sizes[0] + assets,
+            'repeat_view': html_sizes[0],
+        }
+        line = (
+            f"{label:<22}{sizes['html']:>9,}{sizes['html_compressed']:>10,}{inline:>9,}{assets:>12,}"
+            f"{sizes['first_view']:>12,}{sizes['repeat_view']:>13,}"
+        )
+        if baseline is not None:
+            recorded = baseline.get(label)
+            line += f"{sizes['first_view'] - recorded['first_view']:>+13,}" if recorded else f"{'new':>13}"
+        self.stdout.write(line)
+        return sizes
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.payments import process_payment_events
+
+
+class Command(BaseCommand):
+    help = "Apply recorded payment webhook events to their bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Events processed per transaction")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling instead of exiting after one pass")
+        parser.add_argument('--interval', type=int, default=5,
+                            help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_payment_events(batch_size=options['batch_size'])
+            if handled or not options['loop']:
+                self.stdout.write(f"Processed {handled} payment event(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.catalog import rebuild_destination_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DestinationSummary table from upcoming travel options"
+
+    def handle(self, *args, **options):
+        count = rebuild_destination_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} destination summaries"))
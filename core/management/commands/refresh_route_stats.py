@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import refresh_route_stats
+
+
+class Command(BaseCommand):
+    help = ("Update the DailyRouteStats rollup from bookings and travel options changed "
+            "since the last run")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute every departure day, e.g. after bulk deletions")
+
+    def handle(self, *args, **options):
+        days, rows = refresh_route_stats(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {rows} route stats rows for {days} departure days"))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.inventory import cancel_stale_pending_bookings, release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release expired seat holds and cancel stale pending bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Bookings processed per transaction")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep sweeping instead of exiting after one pass")
+        parser.add_argument('--interval', type=int, default=60,
+                            help="Seconds between sweeps with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_holds(batch_size=options['batch_size'])
+            cancelled = cancel_stale_pending_bookings(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Released {released} expired seat hold(s), cancelled {cancelled} stale pending booking(s)"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
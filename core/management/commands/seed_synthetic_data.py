@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import rebuild_destination_summaries
+from core.synthetic import seed_synthetic_data
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic travel options, bookings and passengers for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--travel-options', type=int, default=10000)
+        parser.add_argument('--bookings', type=int, default=50000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--force', action='store_true',
+                            help="Allow seeding when DEBUG is off")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("Refusing to seed synthetic data with DEBUG off, pass --force on a scratch database")
+
+        created = seed_synthetic_data(
+            travel_options=options['travel_options'],
+            bookings=options['bookings'],
+            users=options['users'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        summaries = rebuild_destination_summaries()
+
+        for model, count in created.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Seeded synthetic data, rebuilt {summaries} destination summaries"))
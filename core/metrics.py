@@ -0,0 +1,184 @@
+"""
+Per-request performance metrics.
+
+RequestMetricsMiddleware samples a share of requests. For each sampled request it
+collects the query count and database time, through an execute wrapper installed
+on every connection, plus template render time and total view time. The metrics
+go out as a Server-Timing header and a JSON log line, and are folded into hourly
+per-URL-name histograms that each worker flushes to EndpointTiming.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils import timezone
+
+from .models import EndpointTiming
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BOUNDS_MS = EndpointTiming.HISTOGRAM_BOUNDS_MS
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for one sampled request"""
+    __slots__ = ('queries', 'db_time', 'template_time', 'started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.started = time.perf_counter()
+
+
+def start_request():
+    """Start collecting for the current request; returns the collector and a reset token"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def is_sampled():
+    rate = settings.REQUEST_METRICS_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries of sampled requests"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+class InstrumentedTemplate(Template):
+    """Template that adds its render time to the sampled request's metrics"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name).template, self)
+
+
+def histogram_bucket(view_ms):
+    for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+        if view_ms <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+class MetricsAggregator:
+    """In-process per-URL-name totals, flushed to EndpointTiming every few seconds"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def add(self, url_name, sample):
+        with self.lock:
+            totals = self.pending.get(url_name)
+            if totals is None:
+                totals = self.pending[url_name] = EndpointTiming.empty_totals()
+            totals['requests'] += 1
+            totals['errors'] += sample['status'] >= 500
+            totals['over_budget'] += bool(sample['over_budget'])
+            totals['queries'] += sample['queries']
+            totals['db_ms'] += sample['db_ms']
+            totals['template_ms'] += sample['template_ms']
+            totals['view_ms'] += sample['view_ms']
+            totals['max_view_ms'] = max(totals['max_view_ms'], sample['view_ms'])
+            totals['histogram'][histogram_bucket(sample['view_ms'])] += 1
+
+    def flush_due(self):
+        return time.monotonic() - self.last_flush >= settings.REQUEST_METRICS_FLUSH_INTERVAL
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+
+        period_start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        try:
+            with transaction.atomic():
+                for url_name, totals in pending.items():
+                    timing, _ = EndpointTiming.objects.select_for_update().get_or_create(
+                        url_name=url_name[:EndpointTiming._meta.get_field('url_name').max_length],
+                        period_start=period_start,
+                    )
+                    timing.merge(totals)
+                    timing.save()
+        except Exception:
+            # Metrics must never break the request that happens to flush them
+            logger.exception("Could not flush request metrics")
+
+
+aggregator = MetricsAggregator()
+
+
+def over_budget(sample):
+    """Names of the budgets in settings.REQUEST_METRICS_BUDGETS that the sample exceeds"""
+    return [
+        name for name, limit in settings.REQUEST_METRICS_BUDGETS.items()
+        if limit is not None and sample.get(name, 0) > limit
+    ]
+
+
+def record_request(request, response, metrics):
+    """Report a sampled request: Server-Timing header, log line and aggregate"""
+    match = request.resolver_match
+    url_name = (match.view_name if match else None) or 'unresolved'
+    sample = {
+        'url_name': url_name,
+        'method': request.method,
+        'status': response.status_code,
+        'queries': metrics.queries,
+        'db_ms': round(metrics.db_time * 1000, 2),
+        'template_ms': round(metrics.template_time * 1000, 2),
+        'view_ms': round((time.perf_counter() - metrics.started) * 1000, 2),
+    }
+    sample['over_budget'] = over_budget(sample)
+
+    if settings.REQUEST_METRICS_SERVER_TIMING:
+        response['Server-Timing'] = (
+            f'db;dur={sample["db_ms"]};desc="{sample["queries"]} queries", '
+            f'tpl;dur={sample["template_ms"]}, '
+            f'view;dur={sample["view_ms"]}'
+        )
+
+    level = logging.WARNING if sample['over_budget'] else logging.INFO
+    logger.log(level, json.dumps({'event': 'request_metrics', **sample}))
+    aggregator.add(url_name, sample)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_traveloptionimage_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DestinationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination', models.CharField(max_length=100, unique=True)),
+                ('source', models.CharField(blank=True, help_text='Source of the earliest departure', max_length=100)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('travel_types', models.JSONField(blank=True, default=list)),
+                ('next_departure', models.DateField()),
+                ('primary_image_url', models.URLField(blank=True, max_length=500)),
+                ('active_option_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Destination Summary',
+                'verbose_name_plural': 'Destination Summaries',
+                'ordering': ['next_departure', 'destination'],
+                'indexes': [models.Index(fields=['next_departure', 'destination'], name='core_destsum_next_dep_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:32
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_destination_slugs(apps, schema_editor):
+    TravelOption = apps.get_model('core', 'TravelOption')
+    destinations = TravelOption.objects.values_list('destination', flat=True).distinct()
+    for destination in destinations:
+        TravelOption.objects.filter(destination=destination).update(
+            destination_slug=slugify(destination, allow_unicode=True)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_catalog_and_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traveloption',
+            name='destination_slug',
+            field=models.SlugField(allow_unicode=True, db_index=False, default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_destination_slugs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['destination_slug', 'is_active', 'departure_date', 'departure_time'], name='core_travel_slug_dep_idx'),
+        ),
+    ]
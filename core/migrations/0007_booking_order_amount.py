@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_traveloption_destination_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='order_amount',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
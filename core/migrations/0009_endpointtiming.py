@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_paymentevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointTiming',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_name', models.CharField(max_length=150)),
+                ('period_start', models.DateTimeField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('errors', models.PositiveIntegerField(default=0)),
+                ('over_budget', models.PositiveIntegerField(default=0)),
+                ('queries', models.PositiveBigIntegerField(default=0)),
+                ('db_ms', models.FloatField(default=0)),
+                ('template_ms', models.FloatField(default=0)),
+                ('view_ms', models.FloatField(default=0)),
+                ('max_view_ms', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Endpoint Timing',
+                'verbose_name_plural': 'Endpoint Timings',
+                'ordering': ['-period_start', 'url_name'],
+                'constraints': [models.UniqueConstraint(fields=('url_name', 'period_start'), name='core_endpoint_timing_period_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:42
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_primary_image_urls(apps, schema_editor):
+    TravelOption = apps.get_model('core', 'TravelOption')
+    TravelOptionImage = apps.get_model('core', 'TravelOptionImage')
+    primary_image = TravelOptionImage.objects.filter(
+        travel_option=OuterRef('pk')
+    ).order_by('-is_primary', 'display_order', 'created_at', 'pk').values('image_url')[:1]
+    TravelOption.objects.filter(pk__in=TravelOptionImage.objects.values('travel_option')).update(
+        primary_image_url=Coalesce(Subquery(primary_image), Value(''))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_endpointtiming'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traveloption',
+            name='primary_image_url',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(populate_primary_image_urls, migrations.RunPython.noop),
+    ]
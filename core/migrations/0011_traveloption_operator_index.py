@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_traveloption_primary_image_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['operator_name', 'departure_date', 'departure_time'], name='core_travel_operator_dep_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_booking_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRouteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('departure_date', models.DateField()),
+                ('source', models.CharField(max_length=100)),
+                ('destination', models.CharField(max_length=100)),
+                ('travel_type', models.CharField(choices=[('flight', 'Flight'), ('train', 'Train'), ('bus', 'Bus')], max_length=10)),
+                ('departures', models.PositiveIntegerField(default=0)),
+                ('capacity', models.PositiveIntegerField(default=0, help_text="Seats offered by the day's departures")),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('confirmed_bookings', models.PositiveIntegerField(default=0)),
+                ('cancelled_bookings', models.PositiveIntegerField(default=0)),
+                ('seats_sold', models.PositiveIntegerField(default=0, help_text='Seats of confirmed bookings')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total of confirmed bookings', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Route Stats',
+                'verbose_name_plural': 'Daily Route Stats',
+                'ordering': ['-departure_date', 'source', 'destination', 'travel_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at'], name='core_booking_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['departure_date'], name='core_travel_dep_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['updated_at'], name='core_travel_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyroutestats',
+            constraint=models.UniqueConstraint(fields=('departure_date', 'source', 'destination', 'travel_type'), name='core_route_stats_day_uniq'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-import uuid
+from django.utils.text import slugify
+
+from .ids import new_id
+from .image_urls import variant_url
 
 
 class UserProfile(models.Model):
@@ -39,6 +42,7 @@ class TravelOption(models.Model):
     travel_type = models.CharField(max_length=10, choices=TRAVEL_TYPES)
     source = models.CharField(max_length=100)
     destination = models.CharField(max_length=100)
+    destination_slug = models.SlugField(max_length=100, allow_unicode=True, editable=False, db_index=False)
     departure_date = models.DateField()
     departure_time = models.TimeField()
     arrival_date = models.DateField()
@@ -48,14 +52,20 @@ class TravelOption(models.Model):
     available_seats = models.PositiveIntegerField()
     operator_name = models.CharField(max_length=100)
     is_active = models.BooleanField(default=True)
+    # Copy of the primary image's URL, maintained by core.images
+    primary_image_url = models.URLField(max_length=500, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.travel_id:
-            # Generate unique travel ID
             prefix = self.travel_type.upper()[:2] if self.travel_type else 'TR'
-            self.travel_id = f"{prefix}{str(uuid.uuid4().int)[:8]}"
+            self.travel_id = new_id(prefix)
+        # Normalized key for case-insensitive destination lookups
+        self.destination_slug = slugify(self.destination, allow_unicode=True)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'destination' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'destination_slug'}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -65,6 +75,19 @@ class TravelOption(models.Model):
         verbose_name = "Travel Option"
         verbose_name_plural = "Travel Options"
         ordering = ['departure_date', 'departure_time']
+        indexes = [
+            # Catalog listings: upcoming active departures in departure order
+            models.Index(fields=['is_active', 'departure_date', 'departure_time'], name='core_travel_active_dep_idx'),
+            # Catalog aggregation per destination
+            models.Index(fields=['destination', 'is_active', 'departure_date', 'departure_time'], name='core_travel_dest_dep_idx'),
+            # Destination detail by normalized destination key
+            models.Index(fields=['destination_slug', 'is_active', 'departure_date', 'departure_time'], name='core_travel_slug_dep_idx'),
+            # Timetable imports match departures by operator and departure
+            models.Index(fields=['operator_name', 'departure_date', 'departure_time'], name='core_travel_operator_dep_idx'),
+            # refresh_route_stats reads departure days and picks up changed travel options
+            models.Index(fields=['departure_date'], name='core_travel_dep_date_idx'),
+            models.Index(fields=['updated_at'], name='core_travel_updated_idx'),
+        ]
 
 
 class TravelOptionDetail(models.Model):
@@ -83,7 +106,12 @@ class TravelOptionDetail(models.Model):
 
 
 class TravelOptionImage(models.Model):
-    """Model for storing multiple images for travel options"""
+    """
+    Model for storing multiple images for travel options.
+
+    One image per travel option is primary; core.images keeps that and the travel
+    option's primary_image_url in step.
+    """
     travel_option = models.ForeignKey(TravelOption, on_delete=models.CASCADE, related_name='images')
     image_url = models.URLField(max_length=500, help_text="Cloudinary image URL")
     image_title = models.CharField(max_length=100, blank=True, help_text="Optional title for the image")
@@ -91,35 +119,58 @@ class TravelOptionImage(models.Model):
     display_order = models.PositiveIntegerField(default=0, help_text="Order in which images should be displayed")
     created_at = models.DateTimeField(auto_now_add=True)
 
-    def save(self, *args, **kwargs):
-        # Check if this is a new instance
-        is_new = self.pk is None
-        
-        # If this is the first image for this travel option, make it primary
-        if is_new and not self.is_primary:
-            existing_images = TravelOptionImage.objects.filter(travel_option=self.travel_option).exists()
-            if not existing_images:
-                self.is_primary = True
-        
-        # Save the instance first
-        super().save(*args, **kwargs)
-        
-        # If this image is set as primary, update other images after saving
-        if self.is_primary:
-            TravelOptionImage.objects.filter(
-                travel_option=self.travel_option,
-                is_primary=True
-            ).exclude(pk=self.pk).update(is_primary=False)
-
     def __str__(self):
         return f"Image for {self.travel_option.travel_id} - {self.image_title or 'Untitled'}"
 
+    @property
+    def thumbnail_url(self):
+        return variant_url(self.image_url, 'thumbnail')
+
+    @property
+    def card_url(self):
+        return variant_url(self.image_url, 'card')
+
+    @property
+    def hero_url(self):
+        return variant_url(self.image_url, 'hero')
+
     class Meta:
         verbose_name = "Travel Option Image"
         verbose_name_plural = "Travel Option Images"
         ordering = ['display_order', 'created_at']
 
 
+class DestinationSummary(models.Model):
+    """Materialized per-destination catalog entry, kept in sync by core.signals"""
+    destination = models.CharField(max_length=100, unique=True)
+    source = models.CharField(max_length=100, blank=True, help_text="Source of the earliest departure")
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    travel_types = models.JSONField(default=list, blank=True)
+    next_departure = models.DateField()
+    primary_image_url = models.URLField(max_length=500, blank=True)
+    active_option_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def name(self):
+        return self.destination
+
+    @property
+    def slug(self):
+        return slugify(self.destination, allow_unicode=True)
+
+    def __str__(self):
+        return f"{self.destination} from {self.min_price}"
+
+    class Meta:
+        verbose_name = "Destination Summary"
+        verbose_name_plural = "Destination Summaries"
+        ordering = ['next_departure', 'destination']
+        indexes = [
+            models.Index(fields=['next_departure', 'destination'], name='core_destsum_next_dep_idx'),
+        ]
+
+
 class Booking(models.Model):
     """Model for user bookings with billing information"""
     BOOKING_STATUS = [
@@ -147,8 +198,12 @@ class Booking(models.Model):
     payment_status = models.CharField(max_length=10, choices=PAYMENT_STATUS, default='pending')
     payment_method = models.CharField(max_length=50, blank=True)  # e.g., 'Credit Card', 'PayPal', 'Bank Transfer'
     transaction_id = models.CharField(max_length=100, blank=True)
+    order_amount = models.PositiveIntegerField(null=True, blank=True)  # paise, of the order in transaction_id
     payment_date = models.DateTimeField(null=True, blank=True)
     
+    # Seats are held from booking until payment or until the hold expires
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    
     # Billing Address
     billing_name = models.CharField(max_length=100, blank=True)
     billing_street_address = models.CharField(max_length=255, blank=True)
@@ -161,8 +216,7 @@ class Booking(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.booking_id:
-            # Generate unique booking ID
-            self.booking_id = f"BK{str(uuid.uuid4().int)[:10]}"
+            self.booking_id = new_id('BK')
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -172,6 +226,17 @@ class Booking(models.Model):
         verbose_name = "Booking"
         verbose_name_plural = "Bookings"
         ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['status', 'hold_expires_at'], name='core_booking_hold_idx'),
+            # my_bookings_view: a user's bookings, newest first
+            models.Index(fields=['user', '-booking_date'], name='core_booking_user_date_idx'),
+            # payment_view / payment_success_view look bookings up by Razorpay order id
+            models.Index(fields=['transaction_id'], name='core_booking_txn_idx'),
+            # Booking exports read date ranges in (booking_date, id) order
+            models.Index(fields=['booking_date'], name='core_booking_date_idx'),
+            # refresh_route_stats picks up changed bookings
+            models.Index(fields=['updated_at'], name='core_booking_updated_idx'),
+        ]
 
 
 class Passenger(models.Model):
@@ -196,3 +261,138 @@ class Passenger(models.Model):
     class Meta:
         verbose_name = "Passenger"
         verbose_name_plural = "Passengers"
+
+
+class PaymentEvent(models.Model):
+    """Verified payment gateway webhook event, applied to its booking by process_payment_events"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=50)
+    payment_id = models.CharField(max_length=100, blank=True)
+    order_id = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event} {self.payment_id or self.event_id}"
+
+    class Meta:
+        verbose_name = "Payment Event"
+        verbose_name_plural = "Payment Events"
+        ordering = ['-received_at']
+        indexes = [
+            # process_payment_events walks pending events in primary key order
+            models.Index(fields=['status'], name='core_payevent_status_idx'),
+        ]
+
+
+class EndpointTiming(models.Model):
+    """Hourly request metrics of one URL name, aggregated from sampled requests"""
+    # Upper bounds of the view time histogram buckets; a last bucket holds slower requests
+    HISTOGRAM_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    url_name = models.CharField(max_length=150)
+    period_start = models.DateTimeField()
+    requests = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    over_budget = models.PositiveIntegerField(default=0)
+    queries = models.PositiveBigIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    template_ms = models.FloatField(default=0)
+    view_ms = models.FloatField(default=0)
+    max_view_ms = models.FloatField(default=0)
+    histogram = models.JSONField(default=list)
+
+    @classmethod
+    def empty_totals(cls):
+        return {
+            'requests': 0, 'errors': 0, 'over_budget': 0, 'queries': 0,
+            'db_ms': 0.0, 'template_ms': 0.0, 'view_ms': 0.0, 'max_view_ms': 0.0,
+            'histogram': [0] * (len(cls.HISTOGRAM_BOUNDS_MS) + 1),
+        }
+
+    def merge(self, totals):
+        """Add totals collected by a worker to this row"""
+        for field in ('requests', 'errors', 'over_budget', 'queries', 'db_ms', 'template_ms', 'view_ms'):
+            setattr(self, field, getattr(self, field) + totals[field])
+        self.max_view_ms = max(self.max_view_ms, totals['max_view_ms'])
+        histogram = self.histogram or [0] * len(totals['histogram'])
+        self.histogram = [count + added for count, added in zip(histogram, totals['histogram'])]
+
+    def view_ms_percentile(self, percent):
+        """Upper bound of the histogram bucket holding the given percentile, None if open-ended"""
+        target = self.requests * percent / 100
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return self.HISTOGRAM_BOUNDS_MS[index] if index < len(self.HISTOGRAM_BOUNDS_MS) else None
+        return None
+
+    def __str__(self):
+        return f"{self.url_name} @ {self.period_start:%Y-%m-%d %H:00}"
+
+    class Meta:
+        verbose_name = "Endpoint Timing"
+        verbose_name_plural = "Endpoint Timings"
+        ordering = ['-period_start', 'url_name']
+        constraints = [
+            models.UniqueConstraint(fields=['url_name', 'period_start'], name='core_endpoint_timing_period_uniq'),
+        ]
+
+
+class DailyRouteStats(models.Model):
+    """Bookings, revenue and seats of one route's departures on one day, maintained by core.rollups"""
+    departure_date = models.DateField()
+    source = models.CharField(max_length=100)
+    destination = models.CharField(max_length=100)
+    travel_type = models.CharField(max_length=10, choices=TravelOption.TRAVEL_TYPES)
+    departures = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(default=0, help_text="Seats offered by the day's departures")
+    bookings = models.PositiveIntegerField(default=0)
+    confirmed_bookings = models.PositiveIntegerField(default=0)
+    cancelled_bookings = models.PositiveIntegerField(default=0)
+    seats_sold = models.PositiveIntegerField(default=0, help_text="Seats of confirmed bookings")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Total of confirmed bookings")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def occupancy(self):
+        return self.seats_sold / self.capacity if self.capacity else None
+
+    @property
+    def conversion(self):
+        return self.confirmed_bookings / self.bookings if self.bookings else None
+
+    def __str__(self):
+        return f"{self.source} to {self.destination} ({self.travel_type}) on {self.departure_date}"
+
+    class Meta:
+        verbose_name = "Daily Route Stats"
+        verbose_name_plural = "Daily Route Stats"
+        ordering = ['-departure_date', 'source', 'destination', 'travel_type']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['departure_date', 'source', 'destination', 'travel_type'],
+                name='core_route_stats_day_uniq',
+            ),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Point up to which a rollup has processed changed rows"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
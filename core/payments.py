@@ -0,0 +1,342 @@
+"""
+Payment gateway access.
+
+Every worker keeps one gateway instance, built from ``settings.PAYMENT_GATEWAY``
+on first use, so the Razorpay client and its pooled HTTPS connections outlive a
+single request. Async views await the ``a``-prefixed variants, which keep the
+blocking gateway round trip off the event loop.
+"""
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .inventory import InsufficientSeats, confirm_booking
+from .models import Booking, PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+CURRENCY = 'INR'
+
+# Webhook events that change a booking; anything else is acknowledged and dropped
+CAPTURED_EVENTS = {'payment.captured', 'order.paid'}
+FAILED_EVENTS = {'payment.failed'}
+
+# Processing attempts before an event is parked as failed
+MAX_EVENT_ATTEMPTS = 5
+
+# Errors a gateway call raises for a bad request or an unreachable gateway
+GATEWAY_ERRORS = (
+    razorpay.errors.BadRequestError,
+    razorpay.errors.GatewayError,
+    razorpay.errors.ServerError,
+    requests.RequestException,
+)
+
+_gateway = None
+
+
+class TimeoutSession(requests.Session):
+    """requests session that applies a default timeout to every call"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class PaymentGateway:
+    """Base class for gateways; subclasses implement the blocking calls"""
+
+    async def acreate_order(self, amount, receipt):
+        # The SDK is blocking, so the call waits on a worker thread, not the event loop
+        return await sync_to_async(self.create_order, thread_sensitive=False)(amount, receipt)
+
+
+class RazorpayGateway(PaymentGateway):
+    """Razorpay orders over a pooled, keep-alive HTTPS session"""
+
+    def __init__(self):
+        session = TimeoutSession(timeout=(
+            settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT,
+            settings.PAYMENT_GATEWAY_READ_TIMEOUT,
+        ))
+        session.mount('https://', HTTPAdapter(pool_maxsize=settings.PAYMENT_GATEWAY_POOL_SIZE))
+        self.client = razorpay.Client(
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        )
+        self.key_id = settings.RAZORPAY_KEY_ID
+
+    def create_order(self, amount, receipt):
+        return self.client.order.create({
+            'amount': amount,
+            'currency': CURRENCY,
+            'receipt': receipt,
+            'payment_capture': 1,
+        })
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        try:
+            self.client.utility.verify_payment_signature({
+                'razorpay_order_id': order_id,
+                'razorpay_payment_id': payment_id,
+                'razorpay_signature': signature,
+            })
+        # The SDK's compare_digest raises TypeError for a non-ASCII signature
+        except (razorpay.errors.SignatureVerificationError, TypeError):
+            return False
+        return True
+
+    def verify_webhook_signature(self, body, signature):
+        if not settings.RAZORPAY_WEBHOOK_SECRET:
+            return False
+        try:
+            self.client.utility.verify_webhook_signature(
+                body.decode(), signature, settings.RAZORPAY_WEBHOOK_SECRET
+            )
+        except (razorpay.errors.SignatureVerificationError, UnicodeDecodeError, TypeError):
+            return False
+        return True
+
+
+def _hmac_sha256(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class StubGateway(PaymentGateway):
+    """
+    Offline gateway for benchmarks and load tests.
+
+    Orders are created locally after PAYMENT_GATEWAY_STUB_LATENCY milliseconds, to
+    simulate the round trip, and payments are signed with the configured secret,
+    the same way Razorpay signs them. Never enable it in production.
+    """
+
+    def __init__(self):
+        self.key_id = settings.RAZORPAY_KEY_ID or 'rzp_stub'
+        self.secret = settings.RAZORPAY_KEY_SECRET or 'stub-secret'
+        self.webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET or 'stub-webhook-secret'
+
+    def create_order(self, amount, receipt):
+        if settings.PAYMENT_GATEWAY_STUB_LATENCY:
+            time.sleep(settings.PAYMENT_GATEWAY_STUB_LATENCY / 1000)
+        return {
+            'id': f"order_stub{uuid.uuid4().hex[:14]}",
+            'amount': amount,
+            'currency': CURRENCY,
+            'receipt': receipt,
+            'status': 'created',
+        }
+
+    def sign(self, order_id, payment_id):
+        return _hmac_sha256(self.secret, f"{order_id}|{payment_id}".encode())
+
+    def sign_webhook(self, body):
+        return _hmac_sha256(self.webhook_secret, body)
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        # Bytes, as compare_digest raises TypeError for non-ASCII strings
+        return hmac.compare_digest(self.sign(order_id, payment_id).encode(), signature.encode())
+
+    def verify_webhook_signature(self, body, signature):
+        return hmac.compare_digest(self.sign_webhook(body).encode(), signature.encode())
+
+
+def get_gateway():
+    """The worker's payment gateway, created on first use"""
+    global _gateway
+    if _gateway is None:
+        _gateway = import_string(settings.PAYMENT_GATEWAY)()
+    return _gateway
+
+
+@receiver(setting_changed)
+def _reset_gateway(setting, **kwargs):
+    global _gateway
+    if setting.startswith(('PAYMENT_GATEWAY', 'RAZORPAY_')):
+        _gateway = None
+
+
+def booking_amount(booking):
+    """Booking total in paise, the unit Razorpay orders use"""
+    return int(booking.total_price * 100)
+
+
+def get_or_create_order(booking):
+    """
+    The booking's gateway order, creating one only when none exists yet or the
+    amount has changed since it was created.
+    """
+    amount = booking_amount(booking)
+    if booking.transaction_id and booking.order_amount == amount:
+        return {'id': booking.transaction_id, 'amount': amount, 'currency': CURRENCY}
+
+    order = get_gateway().create_order(amount=amount, receipt=booking.booking_id)
+    if _unclaimed_order(booking).update(transaction_id=order['id'], order_amount=amount, updated_at=timezone.now()):
+        booking.transaction_id, booking.order_amount = order['id'], amount
+        return order
+    booking.refresh_from_db(fields=['transaction_id', 'order_amount'])
+    return _stored_order(booking)
+
+
+async def aget_or_create_order(booking):
+    """Async variant of get_or_create_order"""
+    amount = booking_amount(booking)
+    if booking.transaction_id and booking.order_amount == amount:
+        return {'id': booking.transaction_id, 'amount': amount, 'currency': CURRENCY}
+
+    order = await get_gateway().acreate_order(amount=amount, receipt=booking.booking_id)
+    if await _unclaimed_order(booking).aupdate(transaction_id=order['id'], order_amount=amount, updated_at=timezone.now()):
+        booking.transaction_id, booking.order_amount = order['id'], amount
+        return order
+    await booking.arefresh_from_db(fields=['transaction_id', 'order_amount'])
+    return _stored_order(booking)
+
+
+def _unclaimed_order(booking):
+    # Matches only while the booking still has the order this request saw, so of two
+    # concurrent first loads (a double click, two tabs) only one stores its order
+    return Booking.objects.filter(
+        pk=booking.pk, transaction_id=booking.transaction_id, order_amount=booking.order_amount
+    )
+
+
+def _stored_order(booking):
+    """The order another request stored first; the order created here is left unused"""
+    return {'id': booking.transaction_id, 'amount': booking.order_amount, 'currency': CURRENCY}
+
+
+def apply_captured_payment(booking, payment_method='Razorpay'):
+    """
+    Confirm a booking whose payment was captured.
+
+    If its seats sold out in the meantime the booking is cancelled with the payment
+    kept as completed, so it can be refunded, and False is returned.
+    """
+    now = timezone.now()
+    try:
+        confirm_booking(
+            booking,
+            payment_status='completed',
+            payment_method=payment_method,
+            payment_date=now,
+        )
+    except InsufficientSeats:
+        logger.warning("Seats sold out for paid booking %s", booking.booking_id)
+        Booking.objects.filter(pk=booking.pk).update(
+            payment_status='completed',
+            status='cancelled',
+            payment_method=payment_method,
+            payment_date=now,
+            hold_expires_at=None,
+            updated_at=now,
+        )
+        return False
+    return True
+
+
+def record_payment_event(payload, event_id=''):
+    """
+    Store a verified webhook payload once.
+
+    Gateway retries carry the same event id and are no-ops. Returns the event and
+    whether it was created; the event is None for event types we do not handle.
+    """
+    event = payload.get('event', '')
+    if event not in CAPTURED_EVENTS | FAILED_EVENTS:
+        return None, False
+
+    payment = payload.get('payload', {}).get('payment', {}).get('entity', {})
+    payment_id = payment.get('id', '')
+    return PaymentEvent.objects.get_or_create(
+        event_id=event_id or f"{event}:{payment_id}",
+        defaults={
+            'event': event,
+            'payment_id': payment_id,
+            'order_id': payment.get('order_id') or '',
+            'payload': payload,
+        },
+    )
+
+
+def _apply_event(event, booking):
+    """Apply one event to its booking and return the event's new status"""
+    if booking is None:
+        event.error = f"No booking for order {event.order_id}"
+        return 'ignored'
+    if event.event in CAPTURED_EVENTS:
+        apply_captured_payment(booking)
+    elif event.event in FAILED_EVENTS:
+        Booking.objects.filter(pk=booking.pk).exclude(payment_status='completed').update(
+            payment_status='failed',
+            updated_at=timezone.now(),
+        )
+    return 'processed'
+
+
+def process_payment_events(batch_size=100):
+    """
+    Apply pending payment events to their bookings, oldest first.
+
+    Events are claimed in batches of ``batch_size`` with their bookings loaded in one
+    query, each batch in its own transaction. An event that raises is retried on a
+    later run until it has failed MAX_EVENT_ATTEMPTS times. Returns the number of
+    events processed or ignored.
+    """
+    handled = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            # Events claimed by another consumer are left to it
+            batch = list(
+                PaymentEvent.objects.filter(status='pending', pk__gt=last_pk)
+                .select_for_update(skip_locked=True)
+                .order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+
+            bookings = {
+                booking.transaction_id: booking
+                for booking in Booking.objects.filter(
+                    transaction_id__in={event.order_id for event in batch if event.order_id}
+                )
+            }
+            now = timezone.now()
+            for event in batch:
+                event.attempts += 1
+                try:
+                    with transaction.atomic():
+                        event.status = _apply_event(event, bookings.get(event.order_id))
+                except Exception as exc:
+                    logger.exception("Payment event %s failed", event.event_id)
+                    event.error = str(exc)
+                    event.status = 'failed' if event.attempts >= MAX_EVENT_ATTEMPTS else 'pending'
+                    continue
+                event.processed_at = now
+                handled += 1
+
+            PaymentEvent.objects.bulk_update(batch, ['status', 'attempts', 'error', 'processed_at'])
+
+        last_pk = batch[-1].pk
+        if len(batch) < batch_size:
+            break
+
+    return handled
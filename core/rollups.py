@@ -0,0 +1,124 @@
+"""
+Daily route statistics for the admin dashboard.
+
+DailyRouteStats holds one row per departure day, route and travel type with the
+capacity, bookings, conversions and revenue of that day's departures. The
+refresh_route_stats command recomputes only the departure days of bookings and
+travel options updated since the previous run's watermark, two grouped
+aggregate queries per chunk of days, so its cost follows the volume of changes
+rather than the size of the Booking table. The dashboard reads the rollup alone.
+
+A travel option saved with a new departure date has its old day recomputed by
+core.signals when the save commits. Deleted bookings and travel options leave
+no updated_at behind, and neither do departure dates changed by
+QuerySet.update(); run the command with --rebuild after either.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Booking, DailyRouteStats, RollupWatermark, TravelOption
+
+ROUTE_FIELDS = ('departure_date', 'source', 'destination', 'travel_type')
+WATERMARK = 'daily_route_stats'
+# Rows saved by transactions that commit after a run started are caught by the next run
+WATERMARK_OVERLAP = timedelta(minutes=10)
+DAYS_PER_CHUNK = 31
+TOTAL_FIELDS = (
+    'departures', 'capacity', 'bookings', 'confirmed_bookings', 'cancelled_bookings', 'seats_sold', 'revenue',
+)
+
+
+def changed_departure_dates(since):
+    """Departure days of the bookings and travel options updated at or after ``since``"""
+    bookings = Booking.objects.filter(updated_at__gte=since).order_by().values_list(
+        'travel_option__departure_date', flat=True
+    ).distinct()
+    options = TravelOption.objects.filter(updated_at__gte=since).order_by().values_list(
+        'departure_date', flat=True
+    ).distinct()
+    return set(bookings) | set(options)
+
+
+def route_stats_rows(dates):
+    """Unsaved DailyRouteStats of the given departure days, from one TravelOption and one Booking query"""
+    options = TravelOption.objects.filter(departure_date__in=dates).order_by().values(*ROUTE_FIELDS).annotate(
+        departures=Count('pk'),
+        capacity=Sum('total_seats'),
+    )
+    confirmed = Q(status='confirmed')
+    bookings = Booking.objects.filter(travel_option__departure_date__in=dates).order_by().values(
+        *[f'travel_option__{name}' for name in ROUTE_FIELDS]
+    ).annotate(
+        bookings=Count('pk'),
+        confirmed_bookings=Count('pk', filter=confirmed),
+        cancelled_bookings=Count('pk', filter=Q(status='cancelled')),
+        seats_sold=Sum('number_of_seats', filter=confirmed, default=0),
+        revenue=Sum('total_price', filter=confirmed, default=0),
+    )
+
+    stats = {tuple(row[name] for name in ROUTE_FIELDS): DailyRouteStats(**row) for row in options}
+    for row in bookings:
+        key = tuple(row.pop(f'travel_option__{name}') for name in ROUTE_FIELDS)
+        for name, value in row.items():
+            setattr(stats[key], name, value)
+    return list(stats.values())
+
+
+def refresh_route_stats_for_dates(dates):
+    """Replace the DailyRouteStats rows of the given departure days; returns the number of rows written"""
+    dates = sorted(set(dates))
+    written = 0
+    for start in range(0, len(dates), DAYS_PER_CHUNK):
+        chunk = dates[start:start + DAYS_PER_CHUNK]
+        rows = route_stats_rows(chunk)
+        with transaction.atomic():
+            DailyRouteStats.objects.filter(departure_date__in=chunk).delete()
+            DailyRouteStats.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def refresh_route_stats(rebuild=False):
+    """
+    Bring DailyRouteStats up to date with the bookings and travel options changed
+    since the last run, or recompute every day with ``rebuild``. Returns the
+    numbers of departure days and rows refreshed.
+    """
+    started = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).first()
+    if rebuild or watermark is None:
+        dates = set(TravelOption.objects.order_by().values_list('departure_date', flat=True).distinct())
+        # Days whose travel options are gone lose their rows
+        dates |= set(DailyRouteStats.objects.order_by().values_list('departure_date', flat=True).distinct())
+    else:
+        dates = changed_departure_dates(watermark.value - WATERMARK_OVERLAP)
+
+    written = refresh_route_stats_for_dates(dates)
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': started})
+    return len(dates), written
+
+
+def route_stats_summary(date_from, date_to, limit=10):
+    """
+    Dashboard figures for departures between ``date_from`` and ``date_to``: totals,
+    one row per day, the top routes by revenue and the fullest route days.
+    """
+    stats = DailyRouteStats.objects.filter(departure_date__range=(date_from, date_to)).order_by()
+    sums = {name: Sum(name, default=0) for name in TOTAL_FIELDS}
+
+    fullest = stats.filter(capacity__gt=0).annotate(
+        occupancy_ratio=Cast(F('seats_sold'), FloatField()) / Cast(F('capacity'), FloatField())
+    ).order_by('-occupancy_ratio', '-seats_sold', 'departure_date')[:limit]
+
+    return {
+        'totals': stats.aggregate(**sums),
+        'days': list(stats.values('departure_date').annotate(**sums).order_by('departure_date')),
+        'routes': list(
+            stats.values('source', 'destination').annotate(**sums).order_by('-revenue', 'source', 'destination')[:limit]
+        ),
+        'fullest': list(fullest),
+    }
@@ -0,0 +1,123 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .accounts import invalidate_cached_user
+from .cache import bump_catalog_version, invalidate_featured_destinations
+from .catalog import refresh_destination_summaries
+from .images import in_image_batch, set_primary_image
+from .metrics import record_query
+from .rollups import refresh_route_stats_for_dates
+from .models import TravelOption, TravelOptionDetail, TravelOptionImage, UserProfile
+
+
+def _schedule_summary_refresh(*destinations):
+    """Refresh destination summaries once the surrounding transaction commits"""
+    transaction.on_commit(lambda: refresh_destination_summaries(destinations))
+
+
+@receiver(pre_save, sender=TravelOption)
+def remember_previous_route(sender, instance, raw=False, **kwargs):
+    # A renamed destination has to be refreshed under its old name as well, and a moved
+    # departure's old day has to drop it from the route stats
+    instance._previous_destination = instance._previous_departure_date = None
+    if instance.pk and not raw:
+        instance._previous_destination, instance._previous_departure_date = (
+            TravelOption.objects.filter(pk=instance.pk).values_list('destination', 'departure_date').first()
+            or (None, None)
+        )
+
+
+@receiver(post_save, sender=TravelOption)
+def travel_option_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _schedule_summary_refresh(instance.destination, getattr(instance, '_previous_destination', None))
+    previous_date = getattr(instance, '_previous_departure_date', None)
+    if previous_date and previous_date != instance.departure_date:
+        # refresh_route_stats only sees the new day, through updated_at
+        transaction.on_commit(lambda: refresh_route_stats_for_dates([previous_date]))
+
+
+@receiver(post_delete, sender=TravelOption)
+def travel_option_deleted(sender, instance, **kwargs):
+    _schedule_summary_refresh(instance.destination)
+
+
+@receiver(pre_save, sender=TravelOptionImage)
+def remember_previous_image(sender, instance, raw=False, **kwargs):
+    # Edits that leave the primary flag and the primary's URL alone skip the resync
+    instance._previous_image = None
+    if instance.pk and not raw and not in_image_batch():
+        instance._previous_image = TravelOptionImage.objects.filter(pk=instance.pk).values_list(
+            'travel_option_id', 'is_primary', 'image_url'
+        ).first()
+
+
+def _changes_primary_image(instance, created):
+    if created is None:
+        # Deleted: only a primary image has to be replaced
+        return instance.is_primary
+    previous = getattr(instance, '_previous_image', None)
+    if previous is None:
+        return True
+    travel_option_id, was_primary, image_url = previous
+    return (
+        travel_option_id != instance.travel_option_id
+        or was_primary != instance.is_primary
+        or (instance.is_primary and image_url != instance.image_url)
+    )
+
+
+@receiver(post_save, sender=TravelOptionImage)
+@receiver(post_delete, sender=TravelOptionImage)
+def travel_option_image_changed(sender, instance, raw=False, **kwargs):
+    if raw or in_image_batch():
+        return
+    try:
+        destination = instance.travel_option.destination
+    except TravelOption.DoesNotExist:
+        # The travel option is being deleted along with its images
+        return
+    created = kwargs.get('created')
+    if _changes_primary_image(instance, created):
+        # A saved primary image replaces the current one; otherwise the current one stays
+        is_saved_primary = created is not None and instance.is_primary
+        set_primary_image(instance.travel_option_id, instance.pk if is_saved_primary else None)
+    _schedule_summary_refresh(destination)
+
+
+@receiver(post_save, sender=TravelOptionDetail)
+@receiver(post_delete, sender=TravelOptionDetail)
+def travel_option_detail_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(invalidate_featured_destinations)
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Counts the queries of requests sampled by RequestMetricsMiddleware
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_changed(sender, instance, **kwargs):
+    user_id = instance.pk if sender is User else instance.user_id
+    invalidate_cached_user(user_id)
+    # Again after commit, in case a concurrent request cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
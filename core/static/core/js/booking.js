@@ -0,0 +1,185 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const bookingForm = document.getElementById('booking-form');
+    const basePrice = parseFloat(bookingForm.dataset.pricePerSeat);
+    const passengerCountEl = document.getElementById('passenger-count');
+    const totalPriceEl = document.getElementById('total-price');
+    const numberOfSeatsInput = document.getElementById('id_number_of_seats');
+    const passengerFormsContainer = document.getElementById('passenger-forms');
+    const addPassengerBtn = document.getElementById('add-passenger');
+    const maxPassengers = parseInt(bookingForm.dataset.availableSeats, 10);
+
+    let passengerIndex = 1;
+
+    function updatePrice() {
+        const passengerCount = parseInt(numberOfSeatsInput.value) || 1;
+        const totalPrice = basePrice * passengerCount;
+
+        passengerCountEl.textContent = passengerCount;
+        totalPriceEl.textContent = totalPrice.toLocaleString();
+    }
+
+    function updateFormCounts() {
+        const totalFormsInput = document.querySelector('input[name="form-TOTAL_FORMS"]');
+        const passengerCards = document.querySelectorAll('.passenger-card');
+        totalFormsInput.value = passengerCards.length;
+
+        // Update passenger numbers in headers
+        passengerCards.forEach((card, index) => {
+            const header = card.querySelector('.passenger-header');
+            const removeBtn = card.querySelector('.remove-passenger');
+
+            // Update header text
+            const headerText = `Passenger ${index + 1}`;
+            if (removeBtn) {
+                header.innerHTML = headerText + ' <button type="button" class="btn btn-sm btn-outline-danger float-end remove-passenger"><i class="fas fa-times"></i> Remove</button>';
+            } else {
+                header.innerHTML = headerText;
+            }
+
+            // Update form field names and IDs
+            const inputs = card.querySelectorAll('input, select, textarea');
+            inputs.forEach(input => {
+                const name = input.name;
+                const id = input.id;
+                if (name && name.includes('form-')) {
+                    const newName = name.replace(/form-\d+-/, `form-${index}-`);
+                    input.name = newName;
+                }
+                if (id && id.includes('form-')) {
+                    const newId = id.replace(/form-\d+-/, `form-${index}-`);
+                    input.id = newId;
+                }
+            });
+
+            // Update labels
+            const labels = card.querySelectorAll('label');
+            labels.forEach(label => {
+                const forAttr = label.getAttribute('for');
+                if (forAttr && forAttr.includes('form-')) {
+                    const newFor = forAttr.replace(/form-\d+-/, `form-${index}-`);
+                    label.setAttribute('for', newFor);
+                }
+            });
+        });
+    }
+
+    function createPassengerForm(index) {
+        const template = `
+        <div class="passenger-card" data-form-index="${index}">
+            <div class="passenger-header">
+                Passenger ${index + 1}
+                ${index > 0 ? '<button type="button" class="btn btn-sm btn-outline-danger float-end remove-passenger"><i class="fas fa-times"></i> Remove</button>' : ''}
+            </div>
+            <div class="row">
+                <div class="col-md-6 mb-3">
+                    <label for="id_form-${index}-first_name" class="form-label">First Name *</label>
+                    <input type="text" class="form-control" name="form-${index}-first_name" 
+                           id="id_form-${index}-first_name" placeholder="First name" required>
+                </div>
+                <div class="col-md-6 mb-3">
+                    <label for="id_form-${index}-last_name" class="form-label">Last Name *</label>
+                    <input type="text" class="form-control" name="form-${index}-last_name" 
+                           id="id_form-${index}-last_name" placeholder="Last name" required>
+                </div>
+            </div>
+            <div class="row">
+                <div class="col-md-6 mb-3">
+                    <label for="id_form-${index}-age" class="form-label">Age *</label>
+                    <input type="number" class="form-control" name="form-${index}-age" 
+                           id="id_form-${index}-age" min="1" max="120" placeholder="Age" required>
+                </div>
+                <div class="col-md-6 mb-3">
+                    <label for="id_form-${index}-gender" class="form-label">Gender *</label>
+                    <select class="form-control" name="form-${index}-gender" 
+                            id="id_form-${index}-gender" required>
+                        <option value="">---------</option>
+                        <option value="male">Male</option>
+                        <option value="female">Female</option>
+                        <option value="other">Other</option>
+                    </select>
+                </div>
+            </div>
+        </div>`;
+
+        return template;
+    }
+
+    // Update price when passenger count changes
+    numberOfSeatsInput.addEventListener('change', function() {
+        updatePrice();
+
+        const currentCount = parseInt(this.value) || 1;
+        const existingCards = document.querySelectorAll('.passenger-card').length;
+
+        // Add or remove passenger forms based on count
+        if (currentCount > existingCards) {
+            for (let i = existingCards; i < currentCount; i++) {
+                passengerFormsContainer.insertAdjacentHTML('beforeend', createPassengerForm(i));
+            }
+        } else if (currentCount < existingCards) {
+            const cardsToRemove = document.querySelectorAll('.passenger-card');
+            for (let i = currentCount; i < cardsToRemove.length; i++) {
+                cardsToRemove[i].remove();
+            }
+        }
+
+        updateFormCounts();
+    });
+
+    numberOfSeatsInput.addEventListener('input', updatePrice);
+
+    // Add passenger functionality
+    addPassengerBtn.addEventListener('click', function() {
+        const currentCount = parseInt(numberOfSeatsInput.value) || 1;
+        if (currentCount < maxPassengers) {
+            numberOfSeatsInput.value = currentCount + 1;
+            numberOfSeatsInput.dispatchEvent(new Event('change'));
+        } else {
+            alert(`Maximum ${maxPassengers} passengers allowed for this trip.`);
+        }
+    });
+
+    // Remove passenger functionality (using event delegation)
+    passengerFormsContainer.addEventListener('click', function(e) {
+        if (e.target.classList.contains('remove-passenger') || e.target.closest('.remove-passenger')) {
+            const passengerCard = e.target.closest('.passenger-card');
+            if (passengerCard) {
+                passengerCard.remove();
+                const currentCount = parseInt(numberOfSeatsInput.value) || 1;
+                if (currentCount > 1) {
+                    numberOfSeatsInput.value = currentCount - 1;
+                    updatePrice();
+                    updateFormCounts();
+                }
+            }
+        }
+    });
+
+    // Initialize price
+    updatePrice();
+    updateFormCounts();
+
+    // Form validation before submit
+    document.getElementById('booking-form').addEventListener('submit', function(e) {
+        const requiredFields = this.querySelectorAll('input[required], select[required]');
+        let isValid = true;
+
+        requiredFields.forEach(field => {
+            if (!field.value.trim()) {
+                isValid = false;
+                field.classList.add('is-invalid');
+                if (isValid) { // Focus on the first invalid field only
+                    field.focus();
+                    isValid = false;
+                }
+            } else {
+                field.classList.remove('is-invalid');
+            }
+        });
+
+        if (!isValid) {
+            e.preventDefault();
+            alert('Please fill in all required fields.');
+        }
+    });
+});
@@ -0,0 +1,12 @@
+// Add some confetti effect (optional)
+document.addEventListener('DOMContentLoaded', function() {
+    // Simple celebration animation
+    const icon = document.querySelector('.success-icon i');
+
+    setTimeout(function() {
+        icon.style.transform = 'scale(1.1)';
+        setTimeout(function() {
+            icon.style.transform = 'scale(1)';
+        }, 200);
+    }, 500);
+});
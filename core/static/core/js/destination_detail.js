@@ -0,0 +1,24 @@
+// Enhanced carousel behavior
+document.addEventListener('DOMContentLoaded', function() {
+    const carousel = document.getElementById('heroCarousel');
+    if (carousel) {
+        // Pause on hover, resume on mouse leave
+        carousel.addEventListener('mouseenter', function() {
+            bootstrap.Carousel.getInstance(carousel).pause();
+        });
+
+        carousel.addEventListener('mouseleave', function() {
+            bootstrap.Carousel.getInstance(carousel).cycle();
+        });
+
+        // Add smooth transition effects
+        carousel.addEventListener('slide.bs.carousel', function(e) {
+            // Add fade effect class
+            e.relatedTarget.style.opacity = '0';
+            setTimeout(() => {
+                e.relatedTarget.style.transition = 'opacity 0.6s ease-in-out';
+                e.relatedTarget.style.opacity = '1';
+            }, 50);
+        });
+    }
+});
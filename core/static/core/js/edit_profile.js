@@ -0,0 +1,7 @@
+// Add form-control class to all form fields
+document.addEventListener('DOMContentLoaded', function() {
+    const formFields = document.querySelectorAll('input[type="text"], input[type="date"], textarea');
+    formFields.forEach(field => {
+        field.classList.add('form-control');
+    });
+});
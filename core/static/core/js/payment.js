@@ -0,0 +1,134 @@
+document.getElementById('rzp-button').onclick = function(e) {
+    e.preventDefault();
+    // Per-booking values are rendered into the button's data attributes
+    var config = this.dataset;
+
+    // Show loading
+    document.querySelector('.loading-spinner').style.display = 'block';
+    document.getElementById('rzp-button').style.display = 'none';
+
+    var options = {
+        "key": config.key,
+        "amount": parseInt(config.amount, 10), // Amount in paise
+        "currency": "INR",
+        "name": "Lykke Travel",
+        "description": config.description,
+        "order_id": config.orderId,
+        "handler": function (response) {
+            // Payment successful
+            var form = document.createElement('form');
+            form.method = 'POST';
+            form.action = config.successUrl;
+
+            // Add CSRF token
+            var csrfToken = document.createElement('input');
+            csrfToken.type = 'hidden';
+            csrfToken.name = 'csrfmiddlewaretoken';
+            csrfToken.value = config.csrfToken;
+            form.appendChild(csrfToken);
+
+            // Add payment details
+            var paymentId = document.createElement('input');
+            paymentId.type = 'hidden';
+            paymentId.name = 'razorpay_payment_id';
+            paymentId.value = response.razorpay_payment_id;
+            form.appendChild(paymentId);
+
+            var orderId = document.createElement('input');
+            orderId.type = 'hidden';
+            orderId.name = 'razorpay_order_id';
+            orderId.value = response.razorpay_order_id;
+            form.appendChild(orderId);
+
+            var signature = document.createElement('input');
+            signature.type = 'hidden';
+            signature.name = 'razorpay_signature';
+            signature.value = response.razorpay_signature;
+            form.appendChild(signature);
+
+            var bookingId = document.createElement('input');
+            bookingId.type = 'hidden';
+            bookingId.name = 'booking_id';
+            bookingId.value = config.bookingId;
+            form.appendChild(bookingId);
+
+            document.body.appendChild(form);
+            form.submit();
+        },
+        "prefill": {
+            "name": config.prefillName,
+            "email": config.prefillEmail,
+            "contact": config.prefillContact,
+            "vpa": ""  // UPI VPA can be prefilled if available
+        },
+        "method": {
+            "upi": true,
+            "card": true,
+            "netbanking": true,
+            "wallet": true,
+            "emi": false,
+            "paylater": false
+        },
+        "config": {
+            "display": {
+                "blocks": {
+                    "upi": {
+                        "name": "Pay using UPI",
+                        "instruments": [
+                            {
+                                "method": "upi",
+                                "flows": ["collect", "intent", "qr"]
+                            }
+                        ]
+                    },
+                    "other": {
+                        "name": "Other Payment Methods",
+                        "instruments": [
+                            {
+                                "method": "card"
+                            },
+                            {
+                                "method": "netbanking",
+                                "banks": ["HDFC", "ICICI", "SBI", "AXIS", "YES", "KOTAK", "BOB", "CANARA", "PNB"]
+                            },
+                            {
+                                "method": "wallet",
+                                "wallets": ["paytm", "phonepe", "amazonpay", "freecharge", "mobikwik", "olamoney"]
+                            }
+                        ]
+                    }
+                },
+                "sequence": ["block.upi", "block.other"],
+                "preferences": {
+                    "show_default_blocks": true
+                }
+            }
+        },
+        "notes": {
+            "booking_id": config.bookingId,
+            "travel_option": config.operator
+        },
+        "theme": {
+            "color": "#667eea"
+        },
+        "modal": {
+            "ondismiss": function() {
+                // Payment cancelled
+                document.querySelector('.loading-spinner').style.display = 'none';
+                document.getElementById('rzp-button').style.display = 'block';
+            }
+        }
+    };
+
+    var rzp1 = new Razorpay(options);
+
+    rzp1.on('payment.failed', function (response) {
+        // Payment failed
+        document.querySelector('.loading-spinner').style.display = 'none';
+        document.getElementById('rzp-button').style.display = 'block';
+
+        alert('Payment failed: ' + response.error.description);
+    });
+
+    rzp1.open();
+}
@@ -0,0 +1,8 @@
+// Add form-control class to all form fields
+document.addEventListener('DOMContentLoaded', function() {
+    const formFields = document.querySelectorAll('input[type="text"], input[type="email"], input[type="password"]');
+    formFields.forEach(field => {
+        field.classList.add('form-control');
+        field.setAttribute('placeholder', field.labels[0].textContent.replace(/^\w+\s/, ''));
+    });
+});
@@ -0,0 +1,150 @@
+"""
+Synthetic catalog and booking data for benchmarks and load tests.
+
+Rows are generated in memory and written with bulk_create, so signal handlers do
+not run; callers rebuild DestinationSummary afterwards.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Booking, Passenger, TravelOption
+
+SYNTHETIC_PREFIX = 'SYN'
+
+CITIES = [
+    'Delhi', 'Mumbai', 'Bengaluru', 'Chennai', 'Kolkata', 'Hyderabad', 'Pune', 'Jaipur',
+    'Goa', 'Agra', 'Varanasi', 'Udaipur', 'Shimla', 'Manali', 'Rishikesh', 'Amritsar',
+    'Kochi', 'Mysuru', 'Ooty', 'Darjeeling', 'Leh', 'Srinagar', 'Jodhpur', 'Pondicherry',
+]
+
+OPERATORS = {
+    'flight': ['IndiGo', 'Air India', 'Vistara', 'SpiceJet'],
+    'train': ['Indian Railways'],
+    'bus': ['RedBus Travels', 'VRL Travels', 'Zingbus', 'IntrCity SmartBus'],
+}
+
+
+def generate_travel_options(count, days=180, seed=0, start=0):
+    """Yield ``count`` unsaved upcoming travel options spread over ``days`` days"""
+    rng = random.Random(seed + start)
+    today = timezone.now().date()
+    travel_types = [travel_type for travel_type, _ in TravelOption.TRAVEL_TYPES]
+
+    for index in range(start, start + count):
+        source, destination = rng.sample(CITIES, 2)
+        travel_type = rng.choice(travel_types)
+        departure_date = today + datetime.timedelta(days=rng.randrange(days))
+        departure_time = datetime.time(rng.randrange(24), rng.choice([0, 15, 30, 45]))
+        arrival = datetime.datetime.combine(departure_date, departure_time) + datetime.timedelta(
+            hours=rng.randrange(1, 30)
+        )
+        total_seats = rng.choice([40, 60, 180, 72])
+        yield TravelOption(
+            travel_id=f"{SYNTHETIC_PREFIX}{index:011d}",
+            travel_type=travel_type,
+            source=source,
+            destination=destination,
+            destination_slug=slugify(destination, allow_unicode=True),
+            departure_date=departure_date,
+            departure_time=departure_time,
+            arrival_date=arrival.date(),
+            arrival_time=arrival.time(),
+            price_per_seat=Decimal(rng.randrange(300, 15000)),
+            total_seats=total_seats,
+            available_seats=rng.randrange(total_seats + 1),
+            operator_name=rng.choice(OPERATORS[travel_type]),
+            is_active=rng.random() > 0.05,
+        )
+
+
+def generate_bookings(count, user_ids, travel_options, seed=0, start=0):
+    """Yield ``count`` unsaved bookings spread over the given users and travel options"""
+    rng = random.Random(seed + start)
+    statuses = ['confirmed'] * 6 + ['pending'] * 2 + ['cancelled']
+
+    for index in range(start, start + count):
+        travel_option_id, price_per_seat = rng.choice(travel_options)
+        seats = rng.randrange(1, 5)
+        status = rng.choice(statuses)
+        yield Booking(
+            booking_id=f"{SYNTHETIC_PREFIX}BK{index:011d}",
+            user_id=rng.choice(user_ids),
+            travel_option_id=travel_option_id,
+            number_of_seats=seats,
+            total_price=price_per_seat * seats,
+            status=status,
+            payment_status='completed' if status == 'confirmed' else 'pending',
+            transaction_id=f"order_{SYNTHETIC_PREFIX}{index:011d}",
+            billing_name='Synthetic Traveller',
+        )
+
+
+def generate_passengers(bookings, seed=0):
+    """Yield unsaved passengers, one per booked seat"""
+    rng = random.Random(seed)
+    genders = [gender for gender, _ in Passenger.GENDER_CHOICES]
+
+    for booking_pk, seats in bookings:
+        for seat in range(seats):
+            yield Passenger(
+                booking_id=booking_pk,
+                first_name=f"Passenger{seat + 1}",
+                last_name='Synthetic',
+                age=rng.randrange(1, 90),
+                gender=rng.choice(genders),
+            )
+
+
+def _bulk_create(model, objects, batch_size):
+    batch = []
+    created = 0
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def seed_synthetic_data(travel_options=10000, bookings=50000, users=1000, batch_size=2000, seed=0):
+    """Write a synthetic dataset and return the number of rows created per model"""
+    existing_users = User.objects.filter(username__startswith='synthetic_').count()
+    _bulk_create(User, (
+        User(username=f"synthetic_{index}", password='!')
+        for index in range(existing_users, users)
+    ), batch_size)
+    user_ids = list(User.objects.filter(username__startswith='synthetic_').values_list('pk', flat=True))
+
+    synthetic_options = TravelOption.objects.filter(travel_id__startswith=SYNTHETIC_PREFIX)
+    created_options = _bulk_create(TravelOption, generate_travel_options(
+        travel_options, seed=seed, start=synthetic_options.count()
+    ), batch_size)
+    option_prices = list(synthetic_options.values_list('pk', 'price_per_seat'))
+
+    synthetic_bookings = Booking.objects.filter(booking_id__startswith=SYNTHETIC_PREFIX)
+    last_booking_pk = synthetic_bookings.order_by('-pk').values_list('pk', flat=True).first() or 0
+    created_bookings = _bulk_create(Booking, generate_bookings(
+        bookings, user_ids, option_prices, seed=seed, start=synthetic_bookings.count()
+    ), batch_size)
+
+    # Passengers only for the bookings created by this run
+    booking_seats = synthetic_bookings.filter(pk__gt=last_booking_pk).values_list(
+        'pk', 'number_of_seats'
+    ).iterator(chunk_size=batch_size)
+    created_passengers = _bulk_create(Passenger, generate_passengers(booking_seats, seed=seed), batch_size)
+
+    return {
+        'users': len(user_ids),
+        'travel_options': created_options,
+        'bookings': created_bookings,
+        'passengers': created_passengers,
+    }
@@ -0,0 +1,46 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.image_urls import IMAGE_VARIANTS, variant_height, variant_srcset, variant_url
+
+register = template.Library()
+
+
+@register.filter
+def image_variant(url, variant):
+    """``{{ url|image_variant:'card' }}``: the URL resized for a variant"""
+    return variant_url(url, variant)
+
+
+@register.simple_tag
+def responsive_image(url, variant, alt='', eager=False, sizes=None, **attrs):
+    """
+    An <img> of ``url`` for ``variant`` with srcset, sizes and intrinsic dimensions.
+
+    Images load lazily; pass ``eager=True`` for images in the first viewport, which
+    are then fetched with high priority as Largest Contentful Paint candidates.
+    Remaining keyword arguments become attributes, ``class_`` for ``class``.
+    """
+    if not url:
+        return ''
+    width = IMAGE_VARIANTS[variant]['width']
+    srcset = variant_srcset(url, variant)
+    attributes = {
+        'src': variant_url(url, variant),
+        'srcset': srcset,
+        'sizes': (sizes or IMAGE_VARIANTS[variant]['sizes']) if srcset else '',
+        'alt': alt,
+        'width': width,
+        'height': variant_height(variant, width) or '',
+        'loading': 'eager' if eager else 'lazy',
+        'fetchpriority': 'high' if eager else '',
+        'decoding': 'async',
+    }
+    attributes.update((name.rstrip('_').replace('_', '-'), value) for name, value in attrs.items())
+    return format_html(
+        '<img{}>',
+        format_html_join(
+            '', ' {}="{}"',
+            ((name, value) for name, value in attributes.items() if value != '' or name == 'alt'),
+        ),
+    )
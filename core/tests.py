@@ -1,3 +1,1138 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import io
+import hmac
+import json
+import runpy
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.templatetags.static import static
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .accounts import purge_expired_sessions, user_cache_key
+from .admin import EstimatedCountPaginator
+from .api import encode_cursor
+from .cache import FEATURED_DESTINATIONS_CACHE_KEY, FEATURED_DESTINATIONS_LOCK_KEY, get_featured_destinations
+from .catalog import destination_catalog
+from .management.commands.audit_query_plans import view_queries
+from .bookings import InvalidBooking, create_booking
+from .images import attach_images, reorder_images, save_images
+from .exports import export_lines, export_response, filter_bookings
+from .timetable import import_timetable, read_rows
+from .image_urls import variant_srcset, variant_url
+from .ids import EPOCH_MS, SnowflakeGenerator, decode_base32
+from .loadtest import ORDER_ID_RE, login_session
+from .inventory import InsufficientSeats, confirm_booking, hold_seats, release_expired_holds, release_seats, reserve_seats
+from .metrics import aggregator
+from .models import Booking, DailyRouteStats, DestinationSummary, EndpointTiming, Passenger, PaymentEvent, TravelOption, TravelOptionImage, UserProfile
+from .payments import aget_or_create_order, get_gateway, get_or_create_order, process_payment_events
+from .rollups import refresh_route_stats
+from .views import MY_BOOKINGS_PAGE_SIZE
+
+RAZORPAY_TEST_SECRET = 'test-secret'
+# Pages render {% static %} URLs without a collectstatic manifest
+PLAIN_STATIC_STORAGES = {
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def create_travel_option(**kwargs):
+    departure = timezone.now().date() + datetime.timedelta(days=7)
+    fields = {
+        'travel_type': 'bus',
+        'source': 'Delhi',
+        'destination': 'Goa',
+        'departure_date': departure,
+        'departure_time': datetime.time(9, 0),
+        'arrival_date': departure,
+        'arrival_time': datetime.time(18, 0),
+        'price_per_seat': 500,
+        'total_seats': 40,
+        'available_seats': 40,
+        'operator_name': 'Lykke Express',
+    }
+    fields.update(kwargs)
+    return TravelOption.objects.create(**fields)
+
+
+def run_in_parallel(func, arguments):
+    """Run ``func`` for every argument at once, one thread per argument"""
+    arguments = list(arguments)
+    barrier = threading.Barrier(len(arguments))
+    results = [None] * len(arguments)
+
+    def worker(index, argument):
+        try:
+            barrier.wait()
+            results[index] = func(argument)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(index, argument))
+        for index, argument in enumerate(arguments)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SeatInventoryTests(TransactionTestCase):
+
+    def setUp(self):
+        self.travel_option = create_travel_option(total_seats=10, available_seats=10)
+
+    def test_reserve_and_release(self):
+        reserve_seats(self.travel_option, 4)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 6)
+
+        with self.assertRaises(InsufficientSeats):
+            reserve_seats(self.travel_option, 7)
+
+        release_seats(self.travel_option, 20)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 10)
+
+    def test_parallel_reservations_never_oversell(self):
+        def reserve(_):
+            try:
+                reserve_seats(self.travel_option.pk, 1)
+                return True
+            except InsufficientSeats:
+                return False
+
+        results = run_in_parallel(reserve, range(30))
+
+        self.travel_option.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(self.travel_option.available_seats, 0)
+
+
+class SeatHoldTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.travel_option = create_travel_option(total_seats=10, available_seats=10)
+
+    def create_held_booking(self, seats):
+        booking = Booking(
+            user=self.user,
+            travel_option=self.travel_option,
+            number_of_seats=seats,
+            total_price=self.travel_option.price_per_seat * seats,
+        )
+        hold_seats(booking)
+        booking.save()
+        return booking
+
+    def test_expired_holds_are_released_in_batches(self):
+        expired = [self.create_held_booking(2) for _ in range(3)]
+        active = self.create_held_booking(1)
+        Booking.objects.filter(pk__in=[booking.pk for booking in expired]).update(
+            hold_expires_at=timezone.now() - datetime.timedelta(minutes=1)
+        )
+
+        self.assertEqual(release_expired_holds(batch_size=2), 3)
+
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 9)
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 3)
+        active.refresh_from_db()
+        self.assertEqual(active.status, 'pending')
+
+
+@override_settings(RAZORPAY_KEY_ID='rzp_test', RAZORPAY_KEY_SECRET=RAZORPAY_TEST_SECRET, SECURE_SSL_REDIRECT=False)
+class PaymentConfirmationConcurrencyTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.travel_option = create_travel_option(total_seats=20, available_seats=20)
+
+    def create_booking(self, index, seats=2):
+        return Booking.objects.create(
+            user=self.user,
+            travel_option=self.travel_option,
+            number_of_seats=seats,
+            total_price=self.travel_option.price_per_seat * seats,
+            transaction_id=f'order_{index}',
+        )
+
+    def confirm(self, booking, payment_id='pay_1'):
+        message = f'{booking.transaction_id}|{payment_id}'.encode()
+        signature = hmac.new(RAZORPAY_TEST_SECRET.encode(), message, hashlib.sha256).hexdigest()
+        return Client().post(reverse('payment_success'), {
+            'razorpay_payment_id': payment_id,
+            'razorpay_order_id': booking.transaction_id,
+            'razorpay_signature': signature,
+            'booking_id': booking.booking_id,
+        })
+
+    # Without row locks, the threads' confirmations collide on table locks instead of queueing
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_parallel_confirmations_at_one_departure(self):
+        bookings = [self.create_booking(index) for index in range(15)]
+
+        run_in_parallel(self.confirm, bookings)
+
+        self.travel_option.refresh_from_db()
+        confirmed = Booking.objects.filter(status='confirmed').count()
+        self.assertEqual(confirmed, 10)
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 5)
+        self.assertEqual(self.travel_option.available_seats, 0)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_repeated_confirmation_takes_seats_once(self):
+        booking = self.create_booking(0)
+
+        run_in_parallel(self.confirm, [booking] * 8)
+
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 18)
+
+    def test_malformed_signature_is_a_failed_payment(self):
+        for index, gateway in enumerate(('core.payments.RazorpayGateway', 'core.payments.StubGateway')):
+            booking = self.create_booking(index)
+
+            with override_settings(PAYMENT_GATEWAY=gateway):
+                response = Client().post(reverse('payment_success'), {
+                    'razorpay_payment_id': 'pay_1',
+                    'razorpay_order_id': booking.transaction_id,
+                    'razorpay_signature': 'signé',
+                    'booking_id': booking.booking_id,
+                })
+
+            self.assertRedirects(response, reverse('payment', args=[booking.booking_id]), fetch_redirect_response=False)
+            booking.refresh_from_db()
+            self.assertEqual(booking.payment_status, 'failed', gateway)
+
+    def test_confirmation_keeps_held_seats(self):
+        booking = Booking(
+            user=self.user,
+            travel_option=self.travel_option,
+            number_of_seats=3,
+            total_price=self.travel_option.price_per_seat * 3,
+            transaction_id='order_held',
+        )
+        hold_seats(booking)
+        booking.save()
+
+        self.confirm(booking)
+
+        booking.refresh_from_db()
+        self.travel_option.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertIsNone(booking.hold_expires_at)
+        self.assertEqual(self.travel_option.available_seats, 17)
+
+
+class SnowflakeIdTests(TestCase):
+    def test_ids_are_unique_and_sort_in_creation_order(self):
+        generator = SnowflakeGenerator()
+        ids = [generator.generate('BK') for _ in range(10000)]
+
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        issued_ms = EPOCH_MS + (decode_base32(ids[-1][2:]) >> 22)
+        self.assertAlmostEqual(issued_ms, time.time() * 1000, delta=5000)
+
+    def test_models_use_generated_ids(self):
+        travel_option = create_travel_option(travel_type='train')
+        self.assertRegex(travel_option.travel_id, r'^TR[0-9A-HJKMNP-TV-Z]{13}$')
+
+    def test_replacement_workers_never_share_a_process_slot(self):
+        pre_fork = runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))['pre_fork']
+        server = SimpleNamespace(WORKERS={})
+        for pid in range(100):
+            pre_fork(server, worker := SimpleNamespace())
+            server.WORKERS[pid] = worker
+            slots = [live.id_process_slot for live in server.WORKERS.values()]
+            self.assertEqual(len(slots), len(set(slots)))
+            # The first worker lives on while the others are recycled
+            if len(server.WORKERS) == 3:
+                del server.WORKERS[pid - 1]
+        self.assertEqual(server.WORKERS[0].id_process_slot, 1)
+
+
+class DestinationCatalogTests(TestCase):
+    def test_catalog_takes_two_queries_for_any_number_of_destinations(self):
+        for count in (1, 8):
+            while TravelOption.objects.values('destination').distinct().count() < count:
+                create_travel_option(destination=f'Place {count}-{TravelOption.objects.count()}')
+            # The per-destination aggregates, then each destination's earliest departure
+            with self.assertNumQueries(2):
+                catalog = destination_catalog()
+            self.assertEqual(len(catalog), count)
+            self.assertTrue(all(entry['source'] == 'Delhi' for entry in catalog))
+
+
+class DestinationSummaryTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cheap = create_travel_option(price_per_seat=400)
+            self.dear = create_travel_option(price_per_seat=900, travel_type='train')
+
+    def save(self, travel_option):
+        with self.captureOnCommitCallbacks(execute=True):
+            travel_option.save()
+
+    def summary(self, destination='Goa'):
+        return DestinationSummary.objects.filter(destination=destination).first()
+
+    def test_saves_refresh_the_destination(self):
+        summary = self.summary()
+        self.assertEqual((summary.min_price, summary.active_option_count), (400, 2))
+        self.assertEqual(summary.travel_types, ['train', 'bus'])
+
+        self.cheap.price_per_seat = 300
+        self.save(self.cheap)
+        self.assertEqual(self.summary().min_price, 300)
+
+        self.cheap.is_active = False
+        self.save(self.cheap)
+        self.assertEqual((self.summary().min_price, self.summary().active_option_count), (900, 1))
+        self.assertEqual(self.summary().travel_types, ['train'])
+
+    def test_rename_and_delete_refresh_the_old_destination(self):
+        self.cheap.destination = 'Pune'
+        self.save(self.cheap)
+        self.assertEqual(self.summary().active_option_count, 1)
+        self.assertEqual(self.summary('Pune').min_price, 400)
+
+        self.dear.destination = 'Pune'
+        self.save(self.dear)
+        self.assertIsNone(self.summary())
+        self.assertEqual(self.summary('Pune').active_option_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cheap.delete()
+            self.dear.delete()
+        self.assertFalse(DestinationSummary.objects.exists())
+
+    def test_rebuild_matches_incremental_upkeep(self):
+        create_travel_option(destination='Pune')
+        TravelOption.objects.filter(pk=self.dear.pk).update(price_per_seat=100)
+        DestinationSummary.objects.update(min_price=1)
+        call_command('rebuild_destination_summaries', stdout=io.StringIO())
+
+        self.assertEqual(
+            dict(DestinationSummary.objects.values_list('destination', 'min_price')),
+            {'Goa': 100, 'Pune': 500},
+        )
+
+
+class FeaturedDestinationsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.travel_option = create_travel_option()
+
+    def test_hits_skip_the_database_until_the_catalog_changes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual([entry['name'] for entry in get_featured_destinations()], ['Goa'])
+        with self.assertNumQueries(0):
+            get_featured_destinations()
+
+        self.travel_option.price_per_seat = 300
+        with self.captureOnCommitCallbacks(execute=True):
+            self.travel_option.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_featured_destinations()[0]['min_price'], 300)
+
+    def test_only_the_lock_holder_rebuilds_a_stale_entry(self):
+        stale = [{'name': 'Stale'}]
+        cache.set(FEATURED_DESTINATIONS_CACHE_KEY, (stale, time.time() - 1), 60)
+        cache.add(FEATURED_DESTINATIONS_LOCK_KEY, True, 60)
+
+        # Another request holds the lock: everyone else keeps serving the stale entry
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertEqual(get_featured_destinations(), stale)
+
+        cache.delete(FEATURED_DESTINATIONS_LOCK_KEY)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_featured_destinations()[0]['name'], 'Goa')
+        self.assertIsNone(cache.get(FEATURED_DESTINATIONS_LOCK_KEY))
+        with self.assertNumQueries(0):
+            get_featured_destinations()
+
+
+class ImageManagementTests(TestCase):
+    def setUp(self):
+        self.travel_option = create_travel_option()
+
+    def images(self, count, start=0):
+        return [TravelOptionImage(image_url=f'https://img.example.com/{index}.jpg') for index in range(start, start + count)]
+
+    def primary_image_url(self):
+        self.travel_option.refresh_from_db()
+        return self.travel_option.primary_image_url
+
+    def test_single_saves_keep_one_primary_image(self):
+        first, second = self.images(2)
+        first.travel_option = second.travel_option = self.travel_option
+        first.save()
+        self.assertEqual(self.primary_image_url(), first.image_url)
+
+        second.is_primary = True
+        second.save()
+        self.assertEqual(self.primary_image_url(), second.image_url)
+        self.assertEqual(list(self.travel_option.images.filter(is_primary=True)), [second])
+
+        second.delete()
+        self.assertEqual(self.primary_image_url(), first.image_url)
+
+    def test_edits_that_keep_the_primary_image_skip_the_resync(self):
+        attach_images(self.travel_option, self.images(3), primary_index=0)
+        primary, other, _ = self.travel_option.images.order_by('pk')
+
+        other.image_title = 'Beach'
+        other.image_url = 'https://img.example.com/beach.jpg'
+        with CaptureQueriesContext(connection) as edited:
+            other.save()
+        # The previous state and the update; the siblings and the travel option are left alone
+        self.assertEqual(len(edited), 2)
+        other.delete()
+        self.assertEqual(self.primary_image_url(), primary.image_url)
+
+        primary.image_url = 'https://img.example.com/new.jpg'
+        primary.save()
+        self.assertEqual(self.primary_image_url(), primary.image_url)
+
+    def test_batch_changes_take_constant_queries(self):
+        with CaptureQueriesContext(connection) as few:
+            attach_images(self.travel_option, self.images(2), primary_index=0)
+        with CaptureQueriesContext(connection) as many:
+            attach_images(self.travel_option, self.images(20, start=2), primary_index=5)
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(self.primary_image_url(), 'https://img.example.com/7.jpg')
+
+        images = list(self.travel_option.images.order_by('pk'))
+        reorder_images(self.travel_option, [image.pk for image in reversed(images)], primary_id=images[0].pk)
+        self.assertEqual(self.travel_option.images.order_by('display_order').first(), images[-1])
+        self.assertEqual(self.primary_image_url(), images[0].image_url)
+
+        images[3].is_primary = True
+        with CaptureQueriesContext(connection) as saved:
+            save_images(self.travel_option, new=self.images(3, start=30), changed=[images[3]], deleted=images[:2])
+        self.assertLessEqual(len(saved), len(few) + 2)
+        self.assertEqual(self.travel_option.images.count(), 23)
+        self.assertEqual(self.primary_image_url(), images[3].image_url)
+
+    def test_new_primary_image_beats_an_edited_primary(self):
+        attach_images(self.travel_option, self.images(2), primary_index=0)
+        first = self.travel_option.images.get(is_primary=True)
+        first.image_title = 'Renamed'
+        added = self.images(1, start=2)[0]
+        added.is_primary = True
+
+        save_images(self.travel_option, new=[added], changed=[first])
+        self.assertEqual(self.primary_image_url(), added.image_url)
+        self.assertEqual(list(self.travel_option.images.filter(is_primary=True)), [added])
+
+        # A ticked new image also replaces a primary that was left untouched
+        added_again = self.images(1, start=3)[0]
+        added_again.is_primary = True
+        save_images(self.travel_option, new=[added_again])
+        self.assertEqual(self.primary_image_url(), added_again.image_url)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class ResponsiveImageTests(TestCase):
+    cloudinary_url = 'https://res.cloudinary.com/lykke/image/upload/e_sharpen/v1712/goa/beach.jpg'
+
+    def setUp(self):
+        cache.clear()
+        self.travel_option = create_travel_option()
+
+    def test_cloudinary_urls_get_variant_transformations(self):
+        image = TravelOptionImage(travel_option=self.travel_option, image_url=self.cloudinary_url)
+
+        self.assertEqual(
+            image.card_url,
+            'https://res.cloudinary.com/lykke/image/upload/e_sharpen/c_fill,g_auto,w_600,h_375,f_auto,q_auto/v1712/goa/beach.jpg',
+        )
+        self.assertIn('/c_limit,w_1280,f_auto,q_auto/v1712/', image.hero_url)
+        self.assertEqual(
+            variant_url('https://res.cloudinary.com/lykke/image/upload/in_goa/beach.jpg', 'hero'),
+            'https://res.cloudinary.com/lykke/image/upload/c_limit,w_1280,f_auto,q_auto/in_goa/beach.jpg',
+        )
+        self.assertEqual(variant_srcset('https://img.example.com/1.jpg', 'card'), '')
+        with override_settings(IMAGE_URL_PROVIDER='core.image_urls.ImageUrlProvider'):
+            self.assertEqual(image.thumbnail_url, self.cloudinary_url)
+
+    def test_only_the_first_hero_slide_loads_eagerly(self):
+        attach_images(self.travel_option, [
+            TravelOptionImage(image_url=self.cloudinary_url),
+            TravelOptionImage(image_url=self.cloudinary_url.replace('beach', 'fort')),
+        ])
+        response = self.client.get(reverse('destination_detail', args=['goa']))
+
+        self.assertContains(response, 'srcset="', count=2)
+        self.assertContains(response, 'w_1920,f_auto,q_auto/v1712/goa/fort.jpg 1920w')
+        self.assertContains(response, 'loading="eager" fetchpriority="high"', count=1)
+        self.assertContains(response, 'loading="lazy"', count=1)
+
+
+class TimetableImportTests(TestCase):
+    TIMETABLE = (
+        "travel_type,source,destination,departure_date,departure_time,arrival_date,arrival_time,"
+        "price_per_seat,total_seats,operator_name\n"
+        "bus,Delhi,Jaipur,2030-01-10,08:00,2030-01-10,14:00,{price},40,Zingbus\n"
+        "bus,Delhi,Jaipur,2030-01-10,20:00,2030-01-11,02:00,{price},40,Zingbus\n"
+        "boat,Delhi,Jaipur,2030-01-10,09:00,2030-01-10,15:00,700,40,Zingbus\n"
+        "bus,Delhi,Jaipur,2030-01-10,10:00,2030-01-09,15:00,700,40,Zingbus\n"
+    )
+
+    def run_import(self, price, batch_size=1000):
+        rejected = []
+        stats = import_timetable(
+            read_rows(io.StringIO(self.TIMETABLE.format(price=price)), 'csv'),
+            batch_size=batch_size,
+            on_reject=lambda line_number, row, error: rejected.append((line_number, error)),
+        )
+        return stats, rejected
+
+    def test_import_then_reimport_upserts_by_departure(self):
+        stats, rejected = self.run_import(price=500)
+        self.assertEqual((stats.created, stats.updated, stats.rejected), (2, 0, 2))
+        self.assertEqual([line_number for line_number, _ in rejected], [4, 5])
+        morning = TravelOption.objects.get(departure_time=datetime.time(8, 0))
+        self.assertRegex(morning.travel_id, r'^BU[0-9A-Z]{13}$')
+        self.assertEqual((morning.destination_slug, morning.available_seats), ('jaipur', 40))
+
+        TravelOption.objects.filter(pk=morning.pk).update(available_seats=30)
+        stats, _ = self.run_import(price=550, batch_size=1)
+        self.assertEqual((stats.created, stats.updated), (0, 2))
+        morning.refresh_from_db()
+        self.assertEqual((morning.price_per_seat, morning.available_seats), (550, 30))
+
+        stats, _ = self.run_import(price=550)
+        self.assertEqual((stats.updated, stats.unchanged), (0, 2))
+        self.assertEqual(TravelOption.objects.count(), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0)
+class SearchApiTests(TestCase):
+    def setUp(self):
+        for index in range(7):
+            create_travel_option(price_per_seat=500 + index * 100, departure_time=datetime.time(6 + index, 0))
+        create_travel_option(travel_type='train', destination='Pune')
+
+    def search(self, **params):
+        return self.client.get(reverse('api_search'), params)
+
+    def test_filters_narrow_the_results(self):
+        response = self.search(destination='goa', travel_type='bus', min_price='700', max_price='900')
+
+        self.assertEqual([row['price'] for row in response.json()['results']], ['700.00', '800.00', '900.00'])
+
+    def test_cursor_pages_cover_every_result_once(self):
+        seen, cursor = [], None
+        while True:
+            page = self.search(destination='goa', limit=3, **({'cursor': cursor} if cursor else {})).json()
+            seen += [row['travel_id'] for row in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), set(TravelOption.objects.filter(destination='Goa').values_list('travel_id', flat=True)))
+
+    def test_malformed_parameters_are_rejected(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'cursor': encode_cursor('2025-01-01')}, {'limit': '0'},
+                       {'limit': '101'}, {'min_price': 'NaN'}, {'max_price': 'Infinity'}, {'travel_type': 'boat'}):
+            self.assertEqual(self.search(**params).status_code, 400, params)
+
+
+class AuditQueryPlansTests(TestCase):
+    def setUp(self):
+        travel_option = create_travel_option()
+        passengers = [{'first_name': 'Asha', 'last_name': 'Rao', 'age': 34, 'gender': 'female'}]
+        create_booking(User.objects.create_user('audit_subject'), travel_option, passengers, number_of_seats=1)
+        call_command('rebuild_destination_summaries', stdout=io.StringIO())
+
+    def test_reports_every_hot_query(self):
+        out = io.StringIO()
+        call_command('audit_query_plans', '--benchmark', '--repeat', '1', stdout=out, no_color=True)
+        lines = out.getvalue().splitlines()
+
+        reported = {line[:48].rstrip(): line[48:] for line in lines}
+        for label in view_queries():
+            self.assertRegex(reported.get(label, ''), r'^ (indexed|FULL SCAN on .+|no plan available)  rows=\d+ median=', label)
+        self.assertRegex(reported['payment: booking by booking_id'], r'^ indexed ')
+        self.assertRegex(lines[-1], r'^(No full table scans found|\d+ query plan\(s\) use full table scans)$')
+
+
+class BookingExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('finance_subject')
+        travel_option = create_travel_option()
+        passengers = [{'first_name': 'Asha', 'last_name': 'Rao', 'age': 34, 'gender': 'female'}]
+        self.bookings = [
+            create_booking(self.user, travel_option, passengers, number_of_seats=1, billing_name='=HYPERLINK()')
+            for _ in range(5)
+        ]
+        Booking.objects.filter(pk=self.bookings[0].pk).update(status='cancelled')
+
+    def test_export_streams_filtered_bookings_in_chunks(self):
+        rows = [json.loads(line) for line in export_lines(filter_bookings(status='pending'), 'jsonl', chunk_size=2)]
+
+        self.assertEqual([row['booking_id'] for row in rows], [booking.booking_id for booking in self.bookings[1:]])
+        self.assertEqual(rows[0]['passengers'][0]['first_name'], 'Asha')
+        self.assertEqual(rows[0]['destination'], 'Goa')
+
+    def test_asgi_export_streams_in_batches(self):
+        request = ASGIRequest({'type': 'http', 'method': 'POST', 'path': '/', 'headers': []}, io.BytesIO())
+        with mock.patch('core.exports.ASYNC_EXPORT_BATCH_LINES', 2):
+            response = export_response(Booking.objects.all(), 'jsonl', request)
+            self.assertTrue(response.is_async)
+
+            async def read():
+                return [chunk async for chunk in response.streaming_content]
+            chunks = async_to_sync(read)()
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks).decode(), ''.join(export_lines(Booking.objects.all(), 'jsonl')))
+
+    def test_csv_neutralises_formula_prefixes(self):
+        Booking.objects.filter(pk=self.bookings[1].pk).update(billing_name='\t=1+1', billing_city='\r@SUM(A1)')
+        line = list(export_lines(filter_bookings(status='pending'), 'csv'))[1]
+
+        self.assertIn("'\t=1+1", line)
+        self.assertIn("'\r@SUM(A1)", line)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+    def test_admin_action_streams_csv(self):
+        self.client.force_login(User.objects.create_superuser('finance', password='x'))
+        response = self.client.post(reverse('admin:core_booking_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [booking.pk for booking in self.bookings[:2]],
+        })
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(",'=HYPERLINK(),", lines[1])
+        self.assertIn('Asha Rao (34, female)', lines[1])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+
+    def create_bookings(self, count):
+        passengers = [{'first_name': 'Asha', 'last_name': 'Rao', 'age': 34, 'gender': 'female'}]
+        for _ in range(count):
+            user = User.objects.create_user(f'admin_subject{User.objects.count()}')
+            create_booking(user, create_travel_option(), passengers, number_of_seats=1)
+
+    def changelist_queries(self, name):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:core_{name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.create_bookings(2)
+        few = {name: self.changelist_queries(name) for name in ('booking', 'passenger', 'traveloption')}
+        self.create_bookings(6)
+        many = {name: self.changelist_queries(name) for name in ('booking', 'passenger', 'traveloption')}
+
+        self.assertEqual(many, few)
+        # The source and destination filter choices come from the cache
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:core_traveloption_changelist'))
+        self.assertFalse([query for query in queries if 'DISTINCT' in query['sql']])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_paginator_uses_estimate_only_for_large_unfiltered_tables(self):
+        self.create_bookings(2)
+        with mock.patch('core.admin.estimated_row_count', return_value=5000):
+            self.assertEqual(EstimatedCountPaginator(Booking.objects.order_by('pk'), 100).count, 5000)
+            self.assertEqual(EstimatedCountPaginator(Booking.objects.filter(status='pending'), 100).count, 2)
+        with mock.patch('core.admin.estimated_row_count', return_value=500):
+            self.assertEqual(EstimatedCountPaginator(Booking.objects.order_by('pk'), 100).count, 2)
+
+
+class RouteStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ops_subject')
+        self.passengers = [{'first_name': 'Asha', 'last_name': 'Rao', 'age': 34, 'gender': 'female'}]
+        self.goa = create_travel_option()
+        self.pune = create_travel_option(destination='Pune', departure_date=self.goa.departure_date + datetime.timedelta(days=1))
+
+    def book(self, travel_option, seats=1):
+        return create_booking(self.user, travel_option, self.passengers * seats, number_of_seats=seats)
+
+    def test_refresh_aggregates_and_then_only_touches_changed_days(self):
+        confirm_booking(self.book(self.goa, seats=2))
+        self.book(self.goa)
+        self.book(self.pune)
+        self.assertEqual(refresh_route_stats(), (2, 2))
+
+        stats = DailyRouteStats.objects.get(destination='Goa')
+        self.assertEqual((stats.departures, stats.capacity, stats.bookings, stats.confirmed_bookings), (1, 40, 2, 1))
+        self.assertEqual((stats.seats_sold, stats.revenue), (2, 1000))
+        self.assertEqual(stats.occupancy, 0.05)
+        self.assertEqual(stats.conversion, 0.5)
+
+        # Everything so far is older than the watermark overlap
+        an_hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        Booking.objects.update(updated_at=an_hour_ago)
+        TravelOption.objects.update(updated_at=an_hour_ago)
+        confirm_booking(Booking.objects.get(travel_option=self.pune))
+
+        self.assertEqual(refresh_route_stats(), (1, 1))
+        self.assertEqual(DailyRouteStats.objects.get(destination='Pune').revenue, 500)
+
+    def test_moved_departure_leaves_its_old_day(self):
+        confirm_booking(self.book(self.goa))
+        refresh_route_stats()
+        old_day = self.goa.departure_date
+
+        self.goa.departure_date = old_day + datetime.timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.goa.save()
+        refresh_route_stats()
+
+        self.assertFalse(DailyRouteStats.objects.filter(departure_date=old_day).exists())
+        self.assertEqual(DailyRouteStats.objects.get(departure_date=self.goa.departure_date).seats_sold, 1)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+    def test_dashboard_reads_only_the_rollup(self):
+        confirm_booking(self.book(self.goa, seats=3))
+        refresh_route_stats()
+        self.client.force_login(User.objects.create_superuser('ops', password='x'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_dailyroutestats_dashboard'))
+
+        self.assertContains(response, 'Delhi → Goa')
+        self.assertFalse([query for query in queries if 'core_booking' in query['sql'] or 'core_traveloption' in query['sql']])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class AccountCachingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cached', password='secret')
+        UserProfile.objects.create(user=self.user, city='Pune')
+        self.client.force_login(self.user)
+
+    def test_signed_in_requests_skip_session_user_and_profile_queries(self):
+        self.client.get(reverse('profile'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('profile'))
+
+        self.assertContains(response, 'Pune')
+        self.assertEqual(len(queries), 0)
+
+    def test_profile_save_and_logout_drop_the_cached_user(self):
+        self.client.get(reverse('profile'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('edit_profile'), {'city': 'Goa', 'country': 'India'})
+        self.assertContains(self.client.get(reverse('profile')), 'Goa')
+
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_load_test_and_older_sessions_stay_signed_in(self):
+        for backend in (None, 'django.contrib.auth.backends.ModelBackend'):
+            client = Client()
+            session_key = login_session(self.user)
+            if backend:
+                session = SessionStore(session_key)
+                session[BACKEND_SESSION_KEY] = backend
+                session.save()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            self.assertContains(client.get(reverse('profile')), 'Pune')
+
+    def test_failed_login_checks_the_password_once(self):
+        with mock.patch('django.contrib.auth.models.User.check_password', return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='cached', password='wrong'))
+        self.assertEqual(check_password.call_count, 1)
+        self.assertEqual(authenticate(username='cached', password='secret'), self.user)
+
+    def test_purge_deletes_expired_sessions_in_batches(self):
+        expired = timezone.now() - datetime.timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{index}', session_data='', expire_date=expired) for index in range(5)
+        ])
+
+        self.assertEqual(purge_expired_sessions(batch_size=2), 5)
+        self.assertEqual(Session.objects.count(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class CatalogPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.travel_option = create_travel_option()
+        self.url = reverse('destination_detail', args=['goa'])
+
+    def test_anonymous_pages_are_cached_and_revalidated(self):
+        first = self.client.get(self.url)
+        self.assertContains(first, '40 seats left')
+        self.assertIn('Cookie', first['Vary'])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Seat changes reach the page once they commit
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(self.travel_option, 2)
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertContains(changed, '38 seats left')
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_signed_in_pages_are_personal(self):
+        anonymous = self.client.get(self.url)
+        self.client.force_login(User.objects.create_user('catalog_reader', first_name='Meera'))
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Meera')
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertIn('private', response['Cache-Control'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class DestinationDetailViewTests(TestCase):
+    def setUp(self):
+        self.travel_option = create_travel_option(destination='Goa Beach')
+        attach_images(self.travel_option, [TravelOptionImage(image_url='https://img.example.com/goa.jpg')])
+
+    def test_legacy_name_urls_redirect_to_the_slug(self):
+        response = self.client.get(reverse('destination_detail', args=['Goa Beach']), {'type': 'bus'})
+
+        self.assertRedirects(
+            response, reverse('destination_detail', args=['goa-beach']) + '?type=bus',
+            status_code=301, fetch_redirect_response=False,
+        )
+
+    def test_queries_do_not_grow_with_departures(self):
+        url = reverse('destination_detail', args=['goa-beach'])
+        for count in (1, 10):
+            while TravelOption.objects.count() < count:
+                create_travel_option(destination='Goa Beach', travel_type='train')
+            cache.clear()
+            # The departures with their details, and the first departure's images
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(len(response.context['travel_options']), count)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class StaticBundleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('bundlereader')
+        self.travel_option = create_travel_option()
+
+    def test_pages_link_static_bundles_instead_of_inline_blocks(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('book_travel', args=[self.travel_option.travel_id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '<style')
+        self.assertNotContains(response, '<script>')
+        self.assertContains(response, static('core/css/base.css'))
+        self.assertContains(response, static('core/js/booking.js'))
+        self.assertContains(response, 'data-price-per-seat="500')
+
+    def test_page_weight_covers_the_payment_page_and_compares_with_a_baseline(self):
+        call_command('rebuild_destination_summaries', stdout=io.StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory, 'page_weight.json')
+            call_command('page_weight', '--username', 'bundlereader', '--save', str(baseline), stdout=io.StringIO())
+            recorded = json.loads(baseline.read_text())['pages']
+            out = io.StringIO()
+            call_command('page_weight', '--username', 'bundlereader', '--baseline', str(baseline), stdout=out)
+
+        self.assertGreater(recorded['payment']['first_view'], recorded['payment']['repeat_view'])
+        # The sample booking behind the payment page is rolled back
+        self.assertFalse(Booking.objects.exists())
+        compared = {line.split()[0]: line for line in out.getvalue().splitlines()[1:] if 'skipped' not in line}
+        self.assertEqual(set(compared), set(recorded))
+        self.assertRegex(compared['payment'], r' [+-]\d[\d,]*$')
+
+
+class BookingCreationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grouptraveller')
+        self.travel_option = create_travel_option()
+
+    def passengers(self, count):
+        return [
+            {'first_name': f'Guest{index}', 'last_name': 'Lykke', 'age': 30, 'gender': 'other'}
+            for index in range(count)
+        ]
+
+    def test_group_booking_writes_passengers_in_one_insert(self):
+        with CaptureQueriesContext(connection) as single:
+            create_booking(self.user, self.travel_option, self.passengers(1), number_of_seats=1)
+        with CaptureQueriesContext(connection) as group:
+            booking = create_booking(self.user, self.travel_option, self.passengers(10), number_of_seats=10)
+
+        self.assertEqual(len(group), len(single))
+        self.assertEqual(booking.passengers.count(), 10)
+        self.assertEqual(booking.total_price, 5000)
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 29)
+
+    def test_seat_and_passenger_mismatch_writes_nothing(self):
+        with self.assertRaises(InvalidBooking):
+            create_booking(self.user, self.travel_option, self.passengers(2), number_of_seats=3)
+        with self.assertRaises(InsufficientSeats):
+            create_booking(self.user, self.travel_option, self.passengers(41), number_of_seats=41)
+
+        self.assertFalse(Booking.objects.exists())
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.travel_option.available_seats, 40)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, REQUEST_METRICS_SAMPLE_RATE=0, STORAGES=PLAIN_STATIC_STORAGES)
+class MyBookingsViewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.client.force_login(self.user)
+
+    def create_bookings(self, count, status='confirmed'):
+        for _ in range(count):
+            travel_option = create_travel_option()
+            booking = Booking.objects.create(
+                user=self.user,
+                travel_option=travel_option,
+                number_of_seats=2,
+                total_price=travel_option.price_per_seat * 2,
+                status=status,
+            )
+            Passenger.objects.bulk_create([
+                Passenger(booking=booking, first_name='Asha', last_name='Rao', age=30, gender='female'),
+                Passenger(booking=booking, first_name='Ravi', last_name='Rao', age=32, gender='male'),
+            ])
+
+    def count_queries(self, **params):
+        # Every request starts with the signed-in user uncached
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('my_bookings'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.create_bookings(2)
+        small, _ = self.count_queries()
+
+        self.create_bookings(MY_BOOKINGS_PAGE_SIZE * 3)
+        large, response = self.count_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.context['bookings']), MY_BOOKINGS_PAGE_SIZE)
+
+    def test_pages_cover_history_once(self):
+        self.create_bookings(MY_BOOKINGS_PAGE_SIZE + 3)
+
+        seen = []
+        params = {}
+        while True:
+            _, response = self.count_queries(**params)
+            seen.extend(booking.pk for booking in response.context['bookings'])
+            if not response.context['next_cursor']:
+                break
+            params = {'before': response.context['next_cursor']}
+
+        self.assertEqual(sorted(seen), sorted(Booking.objects.values_list('pk', flat=True)))
+
+    def test_status_filter_runs_in_sql(self):
+        self.create_bookings(3)
+        self.create_bookings(2, status='cancelled')
+
+        _, response = self.count_queries(status='cancelled')
+
+        self.assertEqual([booking.status for booking in response.context['bookings']], ['cancelled'] * 2)
+
+
+@override_settings(
+    PAYMENT_GATEWAY='core.payments.StubGateway',
+    RAZORPAY_WEBHOOK_SECRET='webhook-secret',
+    SECURE_SSL_REDIRECT=False,
+)
+class PaymentWebhookTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.travel_option = create_travel_option(total_seats=10, available_seats=10)
+        self.booking = Booking(
+            user=self.user,
+            travel_option=self.travel_option,
+            number_of_seats=2,
+            total_price=self.travel_option.price_per_seat * 2,
+            transaction_id='order_hook',
+        )
+        hold_seats(self.booking)
+        self.booking.save()
+
+    def post_event(self, event='payment.captured', order_id='order_hook', event_id='evt_1', signature=None):
+        body = json.dumps({
+            'event': event,
+            'payload': {'payment': {'entity': {'id': 'pay_hook', 'order_id': order_id}}},
+        }).encode()
+        return self.client.post(
+            reverse('payment_webhook'),
+            body,
+            content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature or get_gateway().sign_webhook(body),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_retried_webhook_is_applied_once(self):
+        self.assertEqual(self.post_event().json()['status'], 'accepted')
+        self.assertEqual(self.post_event().json()['status'], 'duplicate')
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+        self.assertEqual(process_payment_events(), 1)
+        self.assertEqual(process_payment_events(), 0)
+
+        self.booking.refresh_from_db()
+        self.travel_option.refresh_from_db()
+        self.assertEqual(self.booking.status, 'confirmed')
+        self.assertEqual(self.booking.payment_status, 'completed')
+        self.assertEqual(self.travel_option.available_seats, 8)
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.post_event(signature='forged')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_malformed_signature_is_rejected_by_either_gateway(self):
+        for gateway in ('core.payments.RazorpayGateway', 'core.payments.StubGateway'):
+            with override_settings(PAYMENT_GATEWAY=gateway):
+                self.assertEqual(self.post_event(signature='signé').status_code, 400, gateway)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_event_for_unknown_order_is_ignored(self):
+        self.post_event(order_id='order_unknown')
+
+        process_payment_events()
+
+        self.assertEqual(PaymentEvent.objects.get().status, 'ignored')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'pending')
+
+
+@override_settings(
+    PAYMENT_GATEWAY='core.payments.StubGateway', SECURE_SSL_REDIRECT=False, STORAGES=PLAIN_STATIC_STORAGES,
+)
+class AsyncPaymentViewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='secret')
+        self.travel_option = create_travel_option()
+        self.booking = Booking.objects.create(
+            user=self.user,
+            travel_option=self.travel_option,
+            number_of_seats=1,
+            total_price=self.travel_option.price_per_seat,
+        )
+
+    async def test_payment_page_reuses_order_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        url = reverse('payment', args=[self.booking.booking_id])
+
+        first = await client.get(url)
+        second = await client.get(url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.context['razorpay_order']['id'], second.context['razorpay_order']['id'])
+        await self.booking.arefresh_from_db()
+        self.assertEqual(self.booking.transaction_id, first.context['razorpay_order']['id'])
+
+    def test_concurrent_first_loads_share_one_order(self):
+        first_tab = Booking.objects.get(pk=self.booking.pk)
+        second_tab = Booking.objects.get(pk=self.booking.pk)
+
+        first = get_or_create_order(first_tab)
+        second = async_to_sync(aget_or_create_order)(second_tab)
+
+        self.assertEqual(second['id'], first['id'])
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.transaction_id, first['id'])
+
+    async def test_load_test_finds_the_order_on_the_payment_page(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('payment', args=[self.booking.booking_id]))
+
+        order = ORDER_ID_RE.search(response.content.decode())
+        self.assertIsNotNone(order)
+        self.assertEqual(order.group(1), response.context['razorpay_order']['id'])
+
+    async def test_search_under_asgi(self):
+        response = await AsyncClient().get(reverse('api_search'), {'destination': 'goa'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    REQUEST_METRICS_SAMPLE_RATE=1,
+    REQUEST_METRICS_FLUSH_INTERVAL=0,
+    REQUEST_METRICS_BUDGETS={'queries': 0},
+    STORAGES=PLAIN_STATIC_STORAGES,
+)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.travel_option = create_travel_option(source='Mumbai', destination='Pune')
+        aggregator.flush()
+        # A catalog page cached by another test would render without queries
+        cache.clear()
+
+    def test_sampled_request_reports_timings(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            response = self.client.get(reverse('destinations'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries", tpl;dur=[\d.]+, view;dur=')
+        self.assertIn('"over_budget": ["queries"]', logs.output[0])
+
+        timing = EndpointTiming.objects.get(url_name='destinations')
+        self.assertEqual((timing.requests, timing.over_budget), (1, 1))
+        self.assertGreater(timing.queries, 0)
+        self.assertEqual(sum(timing.histogram), 1)
+
+    def test_unsampled_request_is_not_reported(self):
+        with self.settings(REQUEST_METRICS_SAMPLE_RATE=0):
+            response = self.client.get(reverse('destinations'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(EndpointTiming.objects.exists())
@@ -0,0 +1,253 @@
+"""
+Operator timetable import.
+
+Timetables are CSV or JSON Lines files with one departure per row. They are
+streamed through a generator pipeline, read_rows -> validate_rows -> batches,
+so memory use does not depend on the file size. Each batch is upserted in one
+transaction, keyed on operator, route and departure: departures already in the
+catalog are updated with bulk_update and new ones get their travel IDs assigned
+in memory and are written with bulk_create. Signal handlers do not run, so
+callers refresh the DestinationSummary rows of the touched destinations.
+"""
+import csv
+import datetime
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .ids import new_id
+from .models import TravelOption
+
+REQUIRED_FIELDS = (
+    'travel_type', 'source', 'destination', 'departure_date', 'departure_time',
+    'arrival_date', 'arrival_time', 'price_per_seat', 'total_seats', 'operator_name',
+)
+UPDATE_FIELDS = [
+    'travel_type', 'arrival_date', 'arrival_time', 'price_per_seat', 'total_seats',
+    'available_seats', 'is_active', 'updated_at',
+]
+TRAVEL_TYPES = {travel_type for travel_type, _ in TravelOption.TRAVEL_TYPES}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f'}
+# (operator, departure date) pairs per existing departure lookup query
+LOOKUP_CHUNK_SIZE = 200
+
+
+class InvalidRow(ValueError):
+    """A timetable row that cannot be imported"""
+
+
+@dataclass
+class ImportStats:
+    valid: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    destinations: set = field(default_factory=set)
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) from a CSV or JSON Lines stream"""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row
+    else:
+        raise ValueError(f"Unsupported timetable format {file_format!r}")
+
+
+def _text(row, name):
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    if not value:
+        raise InvalidRow(f"{name} is required")
+    return value
+
+
+def _parse(row, name, parser):
+    value = _text(row, name)
+    try:
+        return parser(value)
+    except (ValueError, InvalidOperation):
+        raise InvalidRow(f"{name} {value!r} is invalid")
+
+
+def clean_row(row):
+    """Validate a raw row and return the TravelOption field values"""
+    if not isinstance(row, dict):
+        raise InvalidRow("not an object")
+    travel_type = _text(row, 'travel_type').lower()
+    if travel_type not in TRAVEL_TYPES:
+        raise InvalidRow(f"travel_type {travel_type!r} is not one of {', '.join(sorted(TRAVEL_TYPES))}")
+    cleaned = {
+        'travel_type': travel_type,
+        'source': _text(row, 'source'),
+        'destination': _text(row, 'destination'),
+        'operator_name': _text(row, 'operator_name'),
+        'departure_date': _parse(row, 'departure_date', datetime.date.fromisoformat),
+        'departure_time': _parse(row, 'departure_time', datetime.time.fromisoformat),
+        'arrival_date': _parse(row, 'arrival_date', datetime.date.fromisoformat),
+        'arrival_time': _parse(row, 'arrival_time', datetime.time.fromisoformat),
+        'price_per_seat': _parse(row, 'price_per_seat', Decimal),
+        'total_seats': _parse(row, 'total_seats', int),
+        'is_active': str(row.get('is_active', '')).strip().lower() not in FALSE_VALUES,
+    }
+    if not cleaned['price_per_seat'].is_finite() or cleaned['price_per_seat'] < 0:
+        raise InvalidRow("price_per_seat must be zero or more")
+    if cleaned['total_seats'] < 1:
+        raise InvalidRow("total_seats must be at least 1")
+    if (cleaned['arrival_date'], cleaned['arrival_time']) < (cleaned['departure_date'], cleaned['departure_time']):
+        raise InvalidRow("arrival is before departure")
+    for name in ('source', 'destination', 'operator_name'):
+        if len(cleaned[name]) > TravelOption._meta.get_field(name).max_length:
+            raise InvalidRow(f"{name} is too long")
+    return cleaned
+
+
+def validate_rows(rows, on_reject):
+    """Yield cleaned rows; ``on_reject(line_number, row, error)`` receives the others"""
+    for line_number, row in rows:
+        try:
+            yield clean_row(row)
+        except InvalidRow as exc:
+            on_reject(line_number, row, str(exc))
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def departure_key(values):
+    """Operator, route and departure of a row or travel option, case-insensitively"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    return (
+        get('operator_name').casefold(),
+        get('source').casefold(),
+        get('destination').casefold(),
+        get('departure_date'),
+        get('departure_time'),
+    )
+
+
+def existing_departures(rows):
+    """
+    Lock and return the stored travel options at the operators, dates and times of
+    ``rows``, a superset of their departures that is looked up through the operator index.
+    """
+    times = defaultdict(set)
+    for row in rows:
+        times[row['operator_name'], row['departure_date']].add(row['departure_time'])
+    groups = list(times.items())
+    options = []
+    # Chunked, as some backends limit the depth of a WHERE clause
+    for start in range(0, len(groups), LOOKUP_CHUNK_SIZE):
+        lookups = [
+            Q(operator_name=operator_name, departure_date=departure_date, departure_time__in=departure_times)
+            for (operator_name, departure_date), departure_times in groups[start:start + LOOKUP_CHUNK_SIZE]
+        ]
+        options.extend(
+            TravelOption.objects.select_for_update().filter(Q(*lookups, _connector=Q.OR)).only(
+                'pk', *UPDATE_FIELDS, 'operator_name', 'source', 'destination', 'departure_date', 'departure_time'
+            )
+        )
+    return options
+
+
+def upsert_batch(rows):
+    """
+    Create or update the travel options of one batch; returns the numbers of created,
+    updated and unchanged departures.
+    """
+    # A departure listed twice in a batch keeps its last row
+    rows = {departure_key(row): row for row in rows}
+    now = timezone.now()
+
+    with transaction.atomic():
+        existing = {departure_key(option): option for option in existing_departures(rows.values())}
+
+        updated = []
+        changed_fields = set()
+        unchanged = 0
+        for key, option in existing.items():
+            row = rows.pop(key, None)
+            if row is None:
+                continue
+            # Seats already sold stay sold when the capacity changes
+            sold = option.total_seats - option.available_seats
+            values = {
+                'travel_type': row['travel_type'],
+                'arrival_date': row['arrival_date'],
+                'arrival_time': row['arrival_time'],
+                'price_per_seat': row['price_per_seat'],
+                'total_seats': row['total_seats'],
+                'available_seats': max(row['total_seats'] - sold, 0),
+                'is_active': row['is_active'],
+            }
+            changed = [name for name, value in values.items() if getattr(option, name) != value]
+            if not changed:
+                # Re-imported timetables mostly repeat what is already stored
+                unchanged += 1
+                continue
+            for name in changed:
+                setattr(option, name, values[name])
+            option.updated_at = now
+            changed_fields.update(changed)
+            updated.append(option)
+        if updated:
+            TravelOption.objects.bulk_update(updated, [*sorted(changed_fields), 'updated_at'])
+
+        TravelOption.objects.bulk_create([
+            TravelOption(
+                travel_id=new_id(row['travel_type'].upper()[:2]),
+                destination_slug=slugify(row['destination'], allow_unicode=True),
+                available_seats=row['total_seats'],
+                **row,
+            )
+            for row in rows.values()
+        ])
+    return len(rows), len(updated), unchanged
+
+
+def import_timetable(rows, batch_size=1000, on_reject=None, on_batch=None, dry_run=False):
+    """
+    Validate and upsert (line number, row) pairs in batches of ``batch_size``.
+
+    ``on_reject(line_number, row, error)`` is called for invalid rows and
+    ``on_batch(stats)`` after every batch. With ``dry_run`` rows are only validated.
+    Returns the ImportStats.
+    """
+    stats = ImportStats()
+
+    def reject(line_number, row, error):
+        stats.rejected += 1
+        if on_reject:
+            on_reject(line_number, row, error)
+
+    for batch in batches(validate_rows(rows, reject), batch_size):
+        stats.valid += len(batch)
+        if not dry_run:
+            created, updated, unchanged = upsert_batch(batch)
+            stats.created += created
+            stats.updated += updated
+            stats.unchanged += unchanged
+            stats.destinations.update(row['destination'] for row in batch)
+        if on_batch:
+            on_batch(stats)
+    return stats
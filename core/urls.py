@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -12,7 +12,9 @@ urlpatterns = [
     path('destination/<str:destination>/', views.destination_detail_view, name='destination_detail'),
     path('book/<str:travel_id>/', views.book_travel_view, name='book_travel'),
     path('payment/success/', views.payment_success_view, name='payment_success'),
+    path('payment/webhook/', views.payment_webhook_view, name='payment_webhook'),
     path('payment/<str:booking_id>/', views.payment_view, name='payment'),
     path('booking/confirmation/<str:booking_id>/', views.booking_confirmation_view, name='booking_confirmation'),
     path('my-bookings/', views.my_bookings_view, name='my_bookings'),
+    path('api/search/', api.search_view, name='api_search'),
 ]
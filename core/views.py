@@ -1,22 +1,34 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, aget_object_or_404, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
 from django import forms
 from django.db.models import Min, Q
 from django.utils import timezone
+from django.utils.text import slugify
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponsePermanentRedirect, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-import razorpay
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
 import json
+import logging
 import uuid
-from .models import UserProfile, TravelOption, TravelOptionDetail, TravelOptionImage, Booking, Passenger
+from .models import UserProfile, TravelOption, TravelOptionDetail, TravelOptionImage, DestinationSummary, Booking, Passenger
 from .forms import BookingForm, PassengerFormSet
+from .api import InvalidSearch, decode_cursor, encode_cursor
+from .bookings import InvalidBooking, create_booking
+from .cache import catalog_page, get_featured_destinations
+from .inventory import InsufficientSeats
+from .payments import GATEWAY_ERRORS, aget_or_create_order, apply_captured_payment, get_gateway, record_payment_event
+
+logger = logging.getLogger(__name__)
+
+MY_BOOKINGS_PAGE_SIZE = 10
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -42,35 +54,14 @@ class UserProfileForm(forms.ModelForm):
         }
 
 
+@catalog_page
 def home(request):
     """Home page view with featured destinations"""
-    # Get featured destinations (limit to 6 for homepage)
-    featured_destinations = {}
-    
-    # Get active travel options
-    active_travel_options = TravelOption.objects.filter(
-        is_active=True,
-        departure_date__gte=timezone.now().date()
-    ).select_related('details').prefetch_related('images')[:6]
-    
-    for option in active_travel_options:
-        destination = option.destination
-        if destination not in featured_destinations:
-            # Get primary image or first image
-            primary_image = option.images.filter(is_primary=True).first()
-            if not primary_image:
-                primary_image = option.images.first()
-            
-            featured_destinations[destination] = {
-                'name': destination,
-                'primary_image': primary_image,
-                'min_price': option.price_per_seat,
-                'travel_types': [option.travel_type],
-                'sample_option': option
-            }
+    # Featured destinations are cached and invalidated on inventory changes
+    featured_destinations = get_featured_destinations()
     
     return render(request, 'core/home.html', {
-        'featured_destinations': list(featured_destinations.values())
+        'featured_destinations': featured_destinations
     })
 
 
@@ -144,86 +135,68 @@ def edit_profile_view(request):
     return render(request, 'core/edit_profile.html', {'form': form})
 
 
+@catalog_page
 def travel_destinations_view(request):
     """View to display all available destinations with primary images"""
-    # Get unique destinations with their primary images and minimum prices
-    destinations = {}
-    
-    # Get all active travel options
-    active_travel_options = TravelOption.objects.filter(
-        is_active=True,
-        departure_date__gte=timezone.now().date()
-    ).select_related('details').prefetch_related('images')
-    
-    for option in active_travel_options:
-        destination = option.destination
-        if destination not in destinations:
-            # Get primary image or first image
-            primary_image = option.images.filter(is_primary=True).first()
-            if not primary_image:
-                primary_image = option.images.first()
-            
-            destinations[destination] = {
-                'name': destination,
-                'primary_image': primary_image,
-                'min_price': option.price_per_seat,
-                'travel_types': [option.travel_type],
-                'sample_option': option
-            }
-        else:
-            # Update minimum price and add travel type
-            if option.price_per_seat < destinations[destination]['min_price']:
-                destinations[destination]['min_price'] = option.price_per_seat
-            
-            if option.travel_type not in destinations[destination]['travel_types']:
-                destinations[destination]['travel_types'].append(option.travel_type)
+    # Minimum prices, travel types and primary images are maintained in DestinationSummary
+    destinations = DestinationSummary.objects.all()
     
     return render(request, 'core/destinations.html', {
-        'destinations': destinations.values()
+        'destinations': destinations
     })
 
 
+@catalog_page
 def destination_detail_view(request, destination):
     """Detailed view for a specific destination"""
-    # Get all active travel options for this destination
-    travel_options = TravelOption.objects.filter(
-        destination__iexact=destination,
+    # Destinations are looked up by their normalized slug; redirect other spellings
+    destination_slug = slugify(destination, allow_unicode=True)
+    if destination != destination_slug and destination_slug:
+        url = reverse('destination_detail', args=[destination_slug])
+        if request.GET:
+            url = f"{url}?{request.GET.urlencode()}"
+        return HttpResponsePermanentRedirect(url)
+    
+    # One query serves the grouping by travel type and the filtered listing
+    all_options = list(TravelOption.objects.filter(
+        destination_slug=destination_slug,
         is_active=True,
         departure_date__gte=timezone.now().date()
-    ).select_related('details').prefetch_related('images').order_by('departure_date', 'departure_time')
+    ).select_related('details').order_by('departure_date', 'departure_time'))
     
-    if not travel_options.exists():
+    if not all_options:
         messages.error(request, f'No travel options found for {destination}.')
         return redirect('destinations')
     
     # Get destination info from first option
-    first_option = travel_options.first()
-    destination_images = first_option.images.all().order_by('display_order')
+    first_option = all_options[0]
+    destination_images = first_option.images.all()
     destination_details = getattr(first_option, 'details', None)
     
     # Group options by travel type
     options_by_type = {}
-    for option in travel_options:
-        if option.travel_type not in options_by_type:
-            options_by_type[option.travel_type] = []
-        options_by_type[option.travel_type].append(option)
+    for option in all_options:
+        options_by_type.setdefault(option.travel_type, []).append(option)
+    
+    travel_options = all_options
     
     # Get date filter if provided
     selected_date = request.GET.get('date')
     if selected_date:
         try:
             selected_date = timezone.datetime.strptime(selected_date, '%Y-%m-%d').date()
-            travel_options = travel_options.filter(departure_date=selected_date)
+            travel_options = [option for option in travel_options if option.departure_date == selected_date]
         except ValueError:
             selected_date = None
     
     # Get travel type filter if provided
     selected_type = request.GET.get('type')
     if selected_type:
-        travel_options = travel_options.filter(travel_type=selected_type)
+        travel_options = [option for option in travel_options if option.travel_type == selected_type]
     
     return render(request, 'core/destination_detail.html', {
-        'destination': destination.title(),
+        'destination': first_option.destination.title(),
+        'destination_slug': destination_slug,
         'travel_options': travel_options,
         'options_by_type': options_by_type,
         'destination_images': destination_images,
@@ -244,24 +217,19 @@ def book_travel_view(request, travel_id):
         passenger_formset = PassengerFormSet(request.POST)
         
         if booking_form.is_valid() and passenger_formset.is_valid():
-            # Create booking
-            booking = booking_form.save(commit=False)
-            booking.user = request.user
-            booking.travel_option = travel_option
-            booking.total_price = travel_option.price_per_seat * booking.number_of_seats
-            booking.status = 'pending'
-            booking.payment_status = 'pending'
-            booking.save()
-            
-            # Create passengers
-            for passenger_form in passenger_formset:
-                if passenger_form.cleaned_data and not passenger_form.cleaned_data.get('DELETE', False):
-                    passenger = passenger_form.save(commit=False)
-                    passenger.booking = booking
-                    passenger.save()
-            
-            # Redirect to payment
-            return redirect('payment', booking_id=booking.booking_id)
+            passengers = [
+                passenger_form.cleaned_data for passenger_form in passenger_formset
+                if passenger_form.cleaned_data and not passenger_form.cleaned_data.get('DELETE', False)
+            ]
+            try:
+                booking = create_booking(request.user, travel_option, passengers, **booking_form.cleaned_data)
+            except InvalidBooking:
+                messages.error(request, 'Please enter one passenger for each seat.')
+            except InsufficientSeats:
+                messages.error(request, 'Sorry, there are not enough seats left on this departure.')
+            else:
+                # Redirect to payment
+                return redirect('payment', booking_id=booking.booking_id)
         else:
             # Add error messages for debugging
             for field, errors in booking_form.errors.items():
@@ -284,37 +252,35 @@ def book_travel_view(request, travel_id):
 
 
 @login_required
-def payment_view(request, booking_id):
+async def payment_view(request, booking_id):
     """Payment page using Razorpay"""
-    booking = get_object_or_404(Booking, booking_id=booking_id, user=request.user)
+    user = await request.auser()
+    booking = await aget_object_or_404(
+        Booking.objects.select_related('travel_option'), booking_id=booking_id, user=user
+    )
     
-    # Initialize Razorpay client
-    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-    
-    # Create Razorpay order
-    razorpay_order = client.order.create({
-        'amount': int(booking.total_price * 100),  # Amount in paise
-        'currency': 'INR',
-        'receipt': booking.booking_id,
-        'payment_capture': 1
-    })
+    if booking.status == 'confirmed':
+        return redirect('booking_confirmation', booking_id=booking.booking_id)
+    if booking.status == 'cancelled':
+        messages.error(request, 'Your seat hold has expired. Please book again.')
+        return redirect('book_travel', travel_id=booking.travel_option.travel_id)
     
-    booking.transaction_id = razorpay_order['id']
-    booking.save()
+    # Reloads and back-navigation reuse the booking's unpaid order
+    razorpay_order = await aget_or_create_order(booking)
     
     context = {
         'booking': booking,
         'razorpay_order': razorpay_order,
-        'razorpay_key_id': settings.RAZORPAY_KEY_ID,
-        'user': request.user,
+        'razorpay_key_id': get_gateway().key_id,
+        'user': user,
     }
     
-    return render(request, 'core/payment.html', context)
+    # Templates may still touch lazy relations, so they render off the event loop
+    return await sync_to_async(render)(request, 'core/payment.html', context)
 
 
 @csrf_exempt
-@csrf_exempt
-def payment_success_view(request):
+async def payment_success_view(request):
     """Handle successful payment callback from Razorpay"""
     if request.method == 'POST':
         try:
@@ -324,64 +290,45 @@ def payment_success_view(request):
             signature = request.POST.get('razorpay_signature')
             booking_id = request.POST.get('booking_id')
             
-            print(f"Payment success data: payment_id={payment_id}, order_id={order_id}, booking_id={booking_id}")
+            logger.info("Payment success callback: payment_id=%s, order_id=%s, booking_id=%s",
+                        payment_id, order_id, booking_id)
             
             if not all([payment_id, order_id, signature, booking_id]):
                 messages.error(request, 'Missing payment information. Please try again.')
                 return redirect('home')
             
-            # Verify payment signature
-            client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-            
             # Get booking using booking_id - don't require user session for callback
             try:
-                booking = Booking.objects.get(booking_id=booking_id)
+                booking = await Booking.objects.aget(booking_id=booking_id)
                 # Verify that the order_id matches our transaction_id
                 if booking.transaction_id != order_id:
-                    print(f"Order ID mismatch: expected {booking.transaction_id}, got {order_id}")
+                    logger.warning("Order ID mismatch for booking %s: expected %s, got %s",
+                                   booking_id, booking.transaction_id, order_id)
                     messages.error(request, 'Payment order mismatch. Please contact support.')
                     return redirect('home')
             except Booking.DoesNotExist:
-                print(f"Booking not found for booking_id: {booking_id}")
+                logger.warning("Booking not found for booking_id: %s", booking_id)
                 messages.error(request, 'Booking not found. Please contact support.')
                 return redirect('home')
             
             # Verify signature
-            params_dict = {
-                'razorpay_order_id': order_id,
-                'razorpay_payment_id': payment_id,
-                'razorpay_signature': signature
-            }
-            
-            try:
-                client.utility.verify_payment_signature(params_dict)
-                
-                # Payment successful
-                booking.payment_status = 'completed'
-                booking.status = 'confirmed'
-                booking.payment_method = 'Razorpay'
-                booking.payment_date = timezone.now()
-                # Store payment ID in a separate field or append to transaction_id
-                booking.save()
-                
-                # Update available seats
-                travel_option = booking.travel_option
-                travel_option.available_seats -= booking.number_of_seats
-                travel_option.save()
-                
-                messages.success(request, 'Payment successful! Your booking is confirmed.')
-                return redirect('booking_confirmation', booking_id=booking.booking_id)
-                
-            except razorpay.errors.SignatureVerificationError:
+            if not get_gateway().verify_payment_signature(order_id, payment_id, signature):
                 booking.payment_status = 'failed'
-                booking.save()
+                await booking.asave(update_fields=['payment_status', 'updated_at'])
                 messages.error(request, 'Payment verification failed. Please try again.')
                 return redirect('payment', booking_id=booking.booking_id)
+            
+            # Payment successful: confirm the booking, keeping its held seats
+            if not await sync_to_async(apply_captured_payment)(booking):
+                messages.error(request, 'Sorry, the seats sold out before your payment completed. '
+                                        'Please contact support for a refund.')
+                return redirect('my_bookings')
+            
+            messages.success(request, 'Payment successful! Your booking is confirmed.')
+            return redirect('booking_confirmation', booking_id=booking.booking_id)
                 
-        except Exception as e:
-            # Log the error for debugging
-            print(f"Payment processing error: {str(e)}")
-            print(f"POST data: {request.POST}")
+        except GATEWAY_ERRORS as e:
+            logger.exception("Payment processing error for booking %s", request.POST.get('booking_id'))
             messages.error(request, f'Payment processing error: {str(e)}')
             # Try to redirect to payment page if we have booking_id
             booking_id = request.POST.get('booking_id')
@@ -392,6 +339,28 @@ def payment_success_view(request):
     return redirect('home')
 
 
+@csrf_exempt
+@require_POST
+async def payment_webhook_view(request):
+    """Verify and record a Razorpay webhook event; process_payment_events applies it"""
+    signature = request.headers.get('X-Razorpay-Signature', '')
+    if not get_gateway().verify_webhook_signature(request.body, signature):
+        logger.warning("Rejected payment webhook with an invalid signature")
+        return JsonResponse({'error': 'Invalid signature'}, status=400)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid payload'}, status=400)
+
+    event, created = await sync_to_async(record_payment_event)(
+        payload, request.headers.get('X-Razorpay-Event-Id', '')
+    )
+    if event is None:
+        return JsonResponse({'status': 'ignored'})
+    return JsonResponse({'status': 'accepted' if created else 'duplicate'})
+
+
 @login_required
 def booking_confirmation_view(request, booking_id):
     """Booking confirmation page"""
@@ -406,9 +375,40 @@ def booking_confirmation_view(request, booking_id):
 
 @login_required
 def my_bookings_view(request):
-    """User's booking history"""
-    bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
-    
+    """User's booking history, newest first, one page at a time"""
+    bookings = Booking.objects.filter(user=request.user)
+
+    status = request.GET.get('status', '')
+    if status in dict(Booking.BOOKING_STATUS):
+        bookings = bookings.filter(status=status)
+    else:
+        status = ''
+
+    # Keyset pagination on (booking_date, id) walks the user/date index
+    before = request.GET.get('before')
+    if before:
+        try:
+            booking_date, pk = decode_cursor(before, timezone.datetime.fromisoformat, int)
+        except InvalidSearch:
+            return redirect('my_bookings')
+        bookings = bookings.filter(
+            Q(booking_date__lt=booking_date) | Q(booking_date=booking_date, pk__lt=pk)
+        )
+
+    bookings = list(
+        bookings.select_related('travel_option')
+        .prefetch_related('passengers')
+        .order_by('-booking_date', '-pk')[:MY_BOOKINGS_PAGE_SIZE + 1]
+    )
+    next_cursor = None
+    if len(bookings) > MY_BOOKINGS_PAGE_SIZE:
+        bookings = bookings[:MY_BOOKINGS_PAGE_SIZE]
+        next_cursor = encode_cursor(bookings[-1].booking_date, bookings[-1].pk)
+
     return render(request, 'core/my_bookings.html', {
         'bookings': bookings,
+        'status': status,
+        'status_choices': Booking.BOOKING_STATUS,
+        'next_cursor': next_cursor,
+        'is_first_page': not before,
     })
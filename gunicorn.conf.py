@@ -5,9 +5,18 @@ import os
 bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
 backlog = 2048
 
+# Application and worker type: SERVER_MODE=asgi serves lykke.asgi through uvicorn
+# workers, so async views can wait on the payment gateway without blocking a worker
+server_mode = os.getenv('SERVER_MODE', 'wsgi')
+if server_mode == 'asgi':
+    wsgi_app = "lykke.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "lykke.wsgi:application"
+    worker_class = "sync"
+
 # Worker processes
-workers = 3
-worker_class = "sync"
+workers = int(os.getenv('WEB_CONCURRENCY', '3'))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -41,3 +50,17 @@ preload_app = True
 
 # Graceful timeout for worker restart
 graceful_timeout = 30
+
+
+def pre_fork(server, worker):
+    # Runs in the master, which keeps each live worker's core.ids process slot (1-31;
+    # 0 is left to management commands). A replacement worker takes the lowest free slot.
+    taken = {getattr(live, 'id_process_slot', None) for live in server.WORKERS.values()}
+    free = [slot for slot in range(1, 32) if slot not in taken]
+    if not free:
+        raise RuntimeError("core.ids allows at most 31 gunicorn workers per host")
+    worker.id_process_slot = free[0]
+
+
+def post_fork(server, worker):
+    os.environ['ID_PROCESS_SLOT'] = str(worker.id_process_slot)
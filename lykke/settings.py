@@ -54,13 +54,23 @@ JAZZMIN_SETTINGS = {
     "icons": {
         "auth": "fas fa-users-cog",
         "auth.user": "fas fa-user",
+        "core.dailyroutestats": "fas fa-chart-line",
         # other icons
     },
+    "custom_links": {
+        "core": [{
+            "name": "Route dashboard",
+            "url": "admin:core_dailyroutestats_dashboard",
+            "icon": "fas fa-tachometer-alt",
+            "permissions": ["core.view_dailyroutestats"],
+        }],
+    },
 }
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.AsyncWhiteNoiseMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,7 +83,8 @@ ROOT_URLCONF = 'lykke.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to core.metrics
+        'BACKEND': 'core.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -107,6 +118,41 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The file-based cache is shared by all Gunicorn workers on a host, so invalidation
+# reaches every worker. Point CACHE_BACKEND at Redis/Memcached when running several hosts.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/lykke_cache'),
+    }
+}
+
+# Sessions are read from the cache and written through to the database on change
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+# request.user and its profile are cached for this many seconds; see core.accounts
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '60'))
+
+# Seconds before the cached home page featured destinations are rebuilt
+FEATURED_DESTINATIONS_CACHE_TIMEOUT = int(os.getenv('FEATURED_DESTINATIONS_CACHE_TIMEOUT', '300'))
+# Seconds anonymous catalog pages are kept; a catalog change retires them sooner
+CATALOG_PAGE_CACHE_TIMEOUT = int(os.getenv('CATALOG_PAGE_CACHE_TIMEOUT', '600'))
+# Seconds the admin's source/destination/city filter choices are cached
+ADMIN_FILTER_CHOICES_TIMEOUT = int(os.getenv('ADMIN_FILTER_CHOICES_TIMEOUT', '600'))
+# Unfiltered admin changelists of larger tables show the database's row estimate instead of COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '100000'))
+
+# Signs users in like ModelBackend and caches request.user; see core.accounts.
+# ModelBackend only serves sessions created before CachedModelBackend was added
+AUTHENTICATION_BACKENDS = [
+    'core.accounts.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,8 +190,19 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# WhiteNoise static files configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise static files configuration: collectstatic writes content-hashed copies with
+# gzip and brotli variants, which WhiteNoise serves with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Image URL provider used by core.image_urls; core.image_urls.ImageUrlProvider serves images as stored
+IMAGE_URL_PROVIDER = os.getenv('IMAGE_URL_PROVIDER', 'core.image_urls.CloudinaryProvider')
 
 # Media files
 MEDIA_URL = '/media/'
@@ -165,7 +222,8 @@ if not DEBUG:
     SECURE_HSTS_SECONDS = 31536000
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
-    SECURE_SSL_REDIRECT = True
+    # Set to False where TLS ends in front of a plain HTTP listener, e.g. local load tests
+    SECURE_SSL_REDIRECT = os.getenv('SECURE_SSL_REDIRECT', 'True').lower() == 'true'
 else:
     # Development settings
     SECURE_SSL_REDIRECT = False
@@ -186,9 +244,42 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'INFO' if not DEBUG else 'DEBUG',
         },
+        'core': {
+            'handlers': ['console'],
+            'level': 'INFO' if not DEBUG else 'DEBUG',
+        },
     },
 }
 
 # Razorpay Payment Gateway Settings
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET')
+RAZORPAY_WEBHOOK_SECRET = os.getenv('RAZORPAY_WEBHOOK_SECRET')
+
+# Gateway class used by core.payments; core.payments.StubGateway works offline for benchmarks
+PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'core.payments.RazorpayGateway')
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_CONNECT_TIMEOUT', '3.05'))
+PAYMENT_GATEWAY_READ_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_READ_TIMEOUT', '10'))
+PAYMENT_GATEWAY_POOL_SIZE = int(os.getenv('PAYMENT_GATEWAY_POOL_SIZE', '10'))
+# Simulated order round trip of StubGateway, in milliseconds
+PAYMENT_GATEWAY_STUB_LATENCY = int(os.getenv('PAYMENT_GATEWAY_STUB_LATENCY', '0'))
+
+# Generator of booking and travel IDs; see core.ids
+ID_GENERATOR = os.getenv('ID_GENERATOR', 'core.ids.SnowflakeGenerator')
+# Distinct per host (0-31) when several hosts write to the same database
+ID_NODE_ID = int(os.getenv('ID_NODE_ID', '0'))
+
+# Minutes a pending booking holds its seats before release_expired_holds frees them
+SEAT_HOLD_MINUTES = int(os.getenv('SEAT_HOLD_MINUTES', '15'))
+
+# Share of requests whose queries, template and view time core.metrics records
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.1'))
+# Sampled requests above any of these are logged as warnings and counted as over budget
+REQUEST_METRICS_BUDGETS = {
+    'queries': int(os.getenv('REQUEST_METRICS_MAX_QUERIES', '20')),
+    'db_ms': float(os.getenv('REQUEST_METRICS_MAX_DB_MS', '100')),
+    'view_ms': float(os.getenv('REQUEST_METRICS_MAX_VIEW_MS', '500')),
+}
+# Seconds between a worker's writes of its aggregated metrics to EndpointTiming
+REQUEST_METRICS_FLUSH_INTERVAL = int(os.getenv('REQUEST_METRICS_FLUSH_INTERVAL', '60'))
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', 'True').lower() == 'true'
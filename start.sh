@@ -16,6 +16,10 @@ echo "Running database migrations..."
 python manage.py makemigrations
 python manage.py migrate
 
+# Rebuild the materialized destination catalog
+echo "Rebuilding destination summaries..."
+python manage.py rebuild_destination_summaries
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
@@ -38,4 +42,4 @@ else:
 
 # Start Gunicorn
 echo "Starting Gunicorn server..."
-exec gunicorn --config gunicorn.conf.py lykke.wsgi:application
+exec gunicorn --config gunicorn.conf.py
@@ -20,6 +20,10 @@ echo "Running database migrations..."
 python manage.py makemigrations
 python manage.py migrate
 
+# Rebuild the materialized destination catalog
+echo "Rebuilding destination summaries..."
+python manage.py rebuild_destination_summaries
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput